@@ -1,300 +1,713 @@
 import os
-import time
 import random
+import time
+from array import array
+from cnf_cache import load_cached
+from cnf_loader import normalize_clause
+from clause_arena import ClauseArena, LEARNED, DELETED, USED
+from vsids import VSIDS
+from restart import make_restart_policy
+from preprocess import Preprocessor
+
+PHASES = ('occurrence', 'positive', 'negative', 'random')
+
 
 class CDCLSolver:
-    def __init__(self):
+    def __init__(self, max_learned=None, max_memory=None, preprocess=True, preprocess_options=None,
+                 decay=0.95, phase='occurrence', seed=None, exchange=None):
         self.clauses = []
         self.num_vars = 0
         self.num_clauses = 0
-        self.counter = {}
-        self.literal_watch = {}
-        self.clauses_literal_watched = []
-        self.implications = {}
-        self.probability = 0.9
+        # Search diversification, e.g. for a portfolio: decay is the VSIDS activity decay,
+        # phase the sign a variable is first decided with ('occurrence': the sign it occurs
+        # with most, 'positive', 'negative' or 'random') and seed, when given, perturbs the
+        # initial activities and drives the random phases
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase: {phase}")
+        self.decay = decay
+        self.phase = phase
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.vsids = VSIDS(0)
+        self.polarity = array('b')      # sign tried first when deciding a variable, saved on backtrack
+        self.restart_policy = make_restart_policy('none')
+        self.arena = ClauseArena()
+        # watches[lit] is a flat list of (clause index, blocker) pairs for the clauses watching
+        # lit, indexed like value; the blocker is another literal of the clause and when it is
+        # true the clause is skipped without touching the arena
+        self.watches = []
         self.restart_count = 0
         self.imp_count = 0
         self.decide_count = 0
         self.learned_count = 0
+        self.minimized_count = 0        # literals removed from learned clauses by minimization
+        # Learned clause database. Clauses with an LBD up to core_lbd are kept for good, up to
+        # mid_lbd while they keep being used in conflict analysis; the rest is the local tier,
+        # whose worst half is deleted at every reduction. A reduction also runs early when
+        # the live learned clauses or the arena exceed max_learned / max_memory (bytes).
+        self.core_lbd = 2
+        self.mid_lbd = 6
+        self.reduce_interval = 2000
+        self.reduce_increment = 300
+        self.next_reduce = self.reduce_interval
+        self.last_reduce = 0
+        self.max_learned = max_learned
+        self.max_memory = max_memory
+        self.learned_live = 0
+        self.deleted_count = 0
+        self.reduce_count = 0
+        self.clause_increment = 1.0
+        self.clause_decay = 0.999
+        self.propagations = 0
         self.decide_pos = []
         self.back = []
         self.model = []
+        # With preprocess False only unit clauses are propagated before search;
+        # preprocess_options are passed on to Preprocessor (time_limit, occurrence_limit, ...)
+        self.preprocess_enabled = preprocess
+        self.preprocess_options = preprocess_options or {}
+        self.preprocessor = None
+        self.original = None        # arena of the input clauses and those added later, for verify_solution
+        # Incremental use: the search structures are built by the first solve() and kept for
+        # the following ones; frozen variables are left alone by the preprocessor
+        self.initialized = False
+        self.unsat = False              # the formula itself has no model, whatever the assumptions
+        self.frozen = set()
+        # After solve() returned -1: the assumptions that together have no model, [] when
+        # the formula itself is unsatisfiable
+        self.core = []
+        # Optional clause_exchange.ClauseExchange: short or low LBD learned clauses are
+        # exported to other solvers, theirs are imported at every restart
+        self.exchange = exchange
+        # Search state: the trail of assigned literals in order plus O(1) lookups.
+        # value is indexed by literal; negative literals wrap around to the upper half
+        # of the array, so value[lit] and value[-lit] never collide (1 true, -1 false).
+        self.trail = []
+        self.value = array('b')
+        self.level = array('i')
+        self.reason = array('i')
+        self.qhead = 0      # trail[qhead:] still has to be propagated
+        self.seen = bytearray()     # conflict analysis marks, one per variable
 
     def read_dimacs_cnf(self, file_path):
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
-        self.clauses_original = self.clauses[:]
+        self.num_vars, self.num_clauses, self.clauses = load_cached(file_path)
     
-    def find_unit_clause(self):
-        for clause in self.clauses:
-            if len(clause) == 1:
-                return clause[0]
-        return 0
-
-    def unit_propagate(self):
-        unit_clause = self.find_unit_clause()
-        while unit_clause != 0:
-            new_unit_clause = 0
-            new_formula = []
-            for clause in self.clauses:
-                if unit_clause in clause:
-                    continue
-                elif -unit_clause in clause:
-                    clause = [lit for lit in clause if lit != -unit_clause]
-                if clause == []:
-                    return [[]], []
-                if len(clause) == 1:
-                    new_unit_clause = clause[0]
-                new_formula.append(clause)
-            self.clauses = new_formula
-            if unit_clause not in self.model:
-                self.model.append(unit_clause)
-            unit_clause = new_unit_clause
-        return
-    
-    def pure_literal_elimination(self):
-        while True:
-            literals = {literal for clause in self.clauses for literal in clause}
-            pure_literals = {literal for literal in literals if -literal not in literals}
-            if not pure_literals:
-                break
-            for literal in pure_literals:
-                if literal not in self.model:
-                    self.model.append(literal)
-            self.clauses = [clause for clause in self.clauses if not any(literal in clause for literal in pure_literals)]
-        return 
+    def preprocess(self):
+        # Simplify the formula before search. Clauses the preprocessor removed stay on its
+        # reconstruction stack, the values it fixed become the level 0 assignments.
+        self.original = ClauseArena.from_clauses(self.clauses)
+        self.preprocessor = Preprocessor(self.num_vars, self.clauses, frozen=self.frozen, **self.preprocess_options)
+        self.clauses = []
+        self.num_vars = self.preprocessor.num_vars
+        if not self.preprocessor.run(simplify=self.preprocess_enabled):
+            self.clauses = [[]]
+            return
+        self.back = self.preprocessor.units[:]
+        self.clauses = self.preprocessor.simplified_clauses()
 
-    def vsids_init(self):
-        # Initialize VSIDS counter for literals
-        for clause in self.clauses:
-            for literal in clause:
-                if literal in self.counter:
-                    self.counter[literal] += 1
-                    continue
-                self.counter[literal] = 1
-        return
+    def init_search(self):
+        # Preprocess the collected clauses and build the search structures, once
+        self.preprocess()
+        self.initialized = True
+        if self.clauses == [[]]:
+            self.unsat = True
+            return
+        self.num_clauses = len(self.clauses)
+        # From here on the clause database is the arena, the list of lists is released
+        self.arena = ClauseArena.from_clauses(self.clauses)
+        self.clauses = []
+        self.init_assignment()
+        self.vsids_init()
+        self.init_watch_list()
+
+    def freeze(self, literals):
+        # Keep the variables of literals out of variable and blocked clause elimination.
+        # Only has an effect before the first solve(); used for variables that assumptions
+        # or added clauses are going to mention.
+        self.frozen.update(abs(literal) for literal in literals)
 
-    def vsids_conflict(self, conflict_clause):
-        # Increment counter for literals in the conflict clause
-        for literal in conflict_clause:
-            self.counter[literal]+=1
+    def restore(self, literals):
+        # Put back the clauses the preprocessor removed because of these variables
+        if self.preprocessor is None:
+            return
+        for clause in self.preprocessor.restore({abs(literal) for literal in literals}):
+            self.attach_clause(clause)
+
+    def add_clause(self, clause, lbd=None):
+        # Add a clause to the formula. Before the first solve() it is only collected, after
+        # it goes straight into the clause database; between solves the solver is on level 0.
+        # With an lbd the clause is a learned one (e.g. from another solver) that reduce_db
+        # may delete again.
+        clause = normalize_clause(list(clause))
+        if clause is None:
+            return      # tautology
+        if not self.initialized:
+            self.clauses.append(clause)
+            return
+        if lbd is None:
+            self.original.add_clause(clause)
+        self.attach_clause(clause, lbd)
+
+    def attach_clause(self, clause, lbd=None):
+        # Put a clause into the clause database of the initialized solver
+        if self.unsat:
+            return
+        self.restore(clause)
+        self.ensure_vars(max(map(abs, clause), default=0))
+        value = self.value
+        if any(value[literal] == 1 for literal in clause):
+            return
+        clause = [literal for literal in clause if value[literal] == 0]
+        if not clause:
+            self.unsat = True
+            return
+        for literal in clause:
+            self.vsids.insert(abs(literal))
+            if not self.polarity[abs(literal)]:
+                self.polarity[abs(literal)] = 1 if literal > 0 else -1
+        if len(clause) == 1:
+            self.enqueue(clause[0])
+            return
+        if lbd is None:
+            self.watch_clause(self.arena.add_clause(clause))
+            return
+        self.learned_live += 1
+        self.watch_clause(self.arena.add_clause(clause, LEARNED, min(lbd, len(clause))))
+
+    def ensure_vars(self, num_vars):
+        # Grow the per-variable and per-literal arrays for variables first seen after the start
+        if num_vars <= self.num_vars:
+            return
+        old = self.num_vars
+        extra = num_vars - old
+        value = array('b', bytes(2 * num_vars + 1))
+        watches = [[] for _ in range(2 * num_vars + 1)]
+        for variable in range(1, old + 1):
+            value[variable], value[-variable] = self.value[variable], self.value[-variable]
+            watches[variable], watches[-variable] = self.watches[variable], self.watches[-variable]
+        self.value = value
+        self.watches = watches
+        self.level.extend(array('i', bytes(4 * extra)))
+        self.reason.extend(array('i', [-1]) * extra)
+        self.seen.extend(bytes(extra))
+        self.polarity.extend(bytes(extra))
+        self.vsids.grow(num_vars)
+        self.num_vars = num_vars
+
+    def init_assignment(self):
+        # Allocate the per-variable arrays and put the preprocessing assignments on level 0
+        self.num_vars = max(self.num_vars, max(map(abs, self.arena.literals), default=0))
+        self.value = array('b', bytes(2 * self.num_vars + 1))
+        self.level = array('i', bytes(4 * (self.num_vars + 1)))
+        self.reason = array('i', [-1]) * (self.num_vars + 1)
+        self.seen = bytearray(self.num_vars + 1)
+        self.trail = []
+        for literal in self.back:
+            if abs(literal) <= self.num_vars:
+                self.enqueue(literal)
+        # Preprocessing already removed these literals from the formula
+        self.qhead = len(self.trail)
+
+    def enqueue(self, literal, reason=-1):
+        # Record literal as true on the current decision level
+        self.value[literal] = 1
+        self.value[-literal] = -1
+        variable = abs(literal)
+        self.level[variable] = len(self.decide_pos)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def cancel_until(self, position):
+        # Unassign every literal from trail[position] onwards
+        value = self.value
+        polarity = self.polarity
+        insert = self.vsids.insert
+        for literal in self.trail[position:]:
+            value[literal] = 0
+            value[-literal] = 0
+            # Phase saving: the variable takes its last value again when it is decided next
+            polarity[abs(literal)] = 1 if literal > 0 else -1
+            insert(abs(literal))
+        del self.trail[position:]
+        self.qhead = min(self.qhead, position)
+
+    def vsids_init(self):
+        # Initial activity is the number of occurrences, the first decision on a variable
+        # takes the sign it occurs with most often unless another phase was asked for
+        occurrences = [0] * (2 * self.num_vars + 1)
+        for literal in self.arena.literals:
+            occurrences[literal] += 1
+        self.vsids = VSIDS(self.num_vars, self.decay)
+        activity = self.vsids.activity
+        self.polarity = array('b', bytes(self.num_vars + 1))
+        rng = self.random
+        phase = self.phase
+        variables = []
+        for variable in range(1, self.num_vars + 1):
+            positive, negative = occurrences[variable], occurrences[-variable]
+            if positive or negative:
+                activity[variable] = positive + negative
+                if self.seed is not None:
+                    activity[variable] *= 1 + rng.random()
+                if phase == 'occurrence':
+                    self.polarity[variable] = 1 if positive >= negative else -1
+                elif phase == 'random':
+                    self.polarity[variable] = rng.choice((1, -1))
+                else:
+                    self.polarity[variable] = 1 if phase == 'positive' else -1
+                if self.value[variable] == 0:
+                    variables.append(variable)
+        self.vsids.build(variables)
         return
 
     def vsids_decay(self):
-        # Decay counter for literals at each conflict
-        for literal in self.counter:
-            self.counter[literal] *= .95
+        # Decay all activities at once by growing the bump increment
+        self.vsids.decay_increment()
         return
 
     def vsids_decide(self):
-        # Choose a variable based on VSIDS heuristic
-        max=0
-        var=0
-        for literal in self.counter:
-            if self.counter[literal]>max and literal not in self.model and -literal not in self.model:
-                    max=self.counter[literal]
-                    var=literal
-        return var
+        # Choose the unassigned variable with the highest activity, 0 when none is left
+        variable = self.vsids.next_unassigned(self.value)
+        return variable * self.polarity[variable]
 
     def init_watch_list(self):
-        # Initialise the literal watch dictionary
-        for literal in self.counter:
-            if literal not in self.literal_watch:
-                self.literal_watch[literal] = []
-            if -literal not in self.literal_watch:
-                self.literal_watch[-literal] = []
-
-        # Populate the watch lists
-        for i, clause in enumerate(self.clauses):
-            watched_literals = []
-            for literal in clause:
-                watched_literals.append(literal)
-                if len(watched_literals) == 2:
-                    break
-            self.clauses_literal_watched.append(watched_literals)
-            for watched_literal in watched_literals:
-                self.literal_watch[watched_literal].append(i)
-
+        # The watched literals are the first two of each clause, each one blocks for the other
+        self.watches = [[] for _ in range(2 * self.num_vars + 1)]
+        watches = self.watches
+        literals = self.arena.literals
+        for i, (start, size) in enumerate(zip(self.arena.offsets, self.arena.sizes)):
+            if size > 1:
+                first, second = literals[start], literals[start + 1]
+                watches[first] += (i, second)
+                watches[second] += (i, first)
         return
+
+    def watch_clause(self, clause_index):
+        literals = self.arena.literals
+        start = self.arena.offsets[clause_index]
+        first, second = literals[start], literals[start + 1]
+        self.watches[first] += (clause_index, second)
+        self.watches[second] += (clause_index, first)
     
-    def init_implication_list(self):
-        for literal in self.counter:
-            if literal not in self.implications:
-                self.implications[literal] = []
-            if -literal not in self.implications:
-                self.implications[-literal] = []
-    
-    def add_implications(self, clause, literal):
-        new_implications = []
-        for lit in clause:
-            if  lit == literal:
-                continue
-            implication = self.implications[-lit]
-            if implication == []:
-                new_implications.append(-lit)
-            new_implications += implication
-        self.implications[literal] = new_implications
-
-    def two_watch_propagate(self, literal):
-        # Perform 2-literal watch propagation
-        propagation_queue = [literal]
-        while propagation_queue:
-            literal = propagation_queue.pop()
-            if -literal not in self.literal_watch:
-                self.literal_watch[-literal] = []
-            for clause_index in reversed(self.literal_watch[-literal]):
-                clause = self.clauses[clause_index]
-                if len(clause) == 1:
-                    propagation_queue.append(clause[0])
-                    self.model.append(clause[0])
+    def two_watch_propagate(self):
+        # Propagate every literal on the trail that has not been processed yet.
+        # The clause keeps its watches in slots 0 and 1; the falsified watch is moved to
+        # slot 1 so slot 0 is the other watch. Watch lists are compacted in place: pairs
+        # that stay are copied down to j, pairs whose clause found a new watch are dropped.
+        literals = self.arena.literals
+        offsets = self.arena.offsets
+        sizes = self.arena.sizes
+        positions = self.arena.positions
+        value = self.value
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watch_list = watches[false_literal]
+            i = j = 0
+            end = len(watch_list)
+            while i < end:
+                clause_index = watch_list[i]
+                blocker = watch_list[i + 1]
+                i += 2
+                if value[blocker] == 1:
+                    watch_list[j] = clause_index
+                    watch_list[j + 1] = blocker
+                    j += 2
+                    continue
+                start = offsets[clause_index]
+                first = literals[start]
+                if first == false_literal:
+                    first = literals[start + 1]
+                    literals[start] = first
+                    literals[start + 1] = false_literal
+                if first != blocker and value[first] == 1:
+                    watch_list[j] = clause_index
+                    watch_list[j + 1] = first
+                    j += 2
                     continue
-                watched_literal_1 = self.clauses_literal_watched[clause_index][0]
-                watched_literal_2 = self.clauses_literal_watched[clause_index][1]
-                # Case that the clause is satisfied
-                if watched_literal_1 in self.model or watched_literal_2 in self.model:  # If one of the watched literals is already true
-                    continue  # Skip to the next watched clause
-                unassigned_literals = [new_literal for new_literal in clause if -new_literal not in self.model]
-                if len(unassigned_literals) == 1:
-                    if unassigned_literals[0] not in self.model:
-                        propagation_queue.append(unassigned_literals[0])
-                        self.model.append(unassigned_literals[0])
-                        self.add_implications(clause, unassigned_literals[0])
-                        continue
-                    new_literal = watched_literal_1 if watched_literal_1 != -literal else watched_literal_2
-                    unassigned_literals.append(new_literal)
-                # Conflict detection: if no unassigned literals, return the conflicting clause
-                if not unassigned_literals:
-                    return clause
-                # Update watched literals and their corresponding clauses
-                self.literal_watch [watched_literal_1].remove(clause_index)
-                self.literal_watch [watched_literal_2].remove(clause_index)
-                self.clauses_literal_watched[clause_index] = unassigned_literals
-                self.literal_watch [unassigned_literals[0]].append(clause_index)
-                self.literal_watch [unassigned_literals[1]].append(clause_index)
+                # Look for a literal that is not false, resuming where the last search stopped
+                size = sizes[clause_index]
+                position = positions[clause_index]
+                found = 0
+                for k in range(position, size):
+                    if value[literals[start + k]] != -1:
+                        found = k
+                        break
+                else:
+                    for k in range(2, position):
+                        if value[literals[start + k]] != -1:
+                            found = k
+                            break
+                if found:
+                    positions[clause_index] = found
+                    new_watch = literals[start + found]
+                    literals[start + 1] = new_watch
+                    literals[start + found] = false_literal
+                    watches[new_watch] += (clause_index, first)
+                    continue
+                # Clause is unit or conflicting, it keeps watching false_literal
+                watch_list[j] = clause_index
+                watch_list[j + 1] = first
+                j += 2
+                if value[first] == -1:
+                    watch_list[j:] = watch_list[i:]
+                    self.qhead = len(trail)
+                    return clause_index
+                self.enqueue(first, clause_index)
+            del watch_list[j:]
         return None # No conflict Detected
 
-    def random_restart(self):
-        # Perform random restarts with decaying probability
-        if random.random() < self.probability:  # If the generated random probability is less than the current probability
-            self.model = self.back[:]
-            self.decide_pos = []  # Clear the decision position list
-            self.probability *= 0.5  # Decay the probability by 50%
-            self.restart_count += 1  # Increment the restart count
-            if self.probability < 0.001:  # Ensure minimum probability
-                self.probability = 0.2
-            if self.restart_count > len(self.model) + 10:  # Avoid excessive restarts
-                self.probability = 0
+    def import_shared(self):
+        # Add the clauses other solvers exported, on level 0 right after a restart.
+        # Returns False when they make the formula unsatisfiable.
+        for clause, lbd in self.exchange.import_clauses():
+            self.add_clause(clause, lbd)
+            if self.unsat:
+                return False
+        return self.two_watch_propagate() is None
+
+    def backtrack_to_root(self):
+        # Back to level 0, learned units and preprocessing assignments stay
+        if self.decide_pos:
+            self.cancel_until(self.decide_pos[0])
+        self.decide_pos = []  # Clear the decision position list
+
+    def restart(self):
+        self.backtrack_to_root()
+        self.restart_count += 1  # Increment the restart count
+        self.restart_policy.on_restart()
+
+    def analyse_conflict(self, conflict_index):
+        # First UIP analysis: resolve the conflict clause with the reasons of the current
+        # level literals, walking the trail backwards, until one literal of the current
+        # level is left. Returns the learned clause, asserting literal first and a literal
+        # of the backjump level second, and the backjump level.
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        literals = self.arena.literals
+        offsets = self.arena.offsets
+        sizes = self.arena.sizes
+        flags = self.arena.flags
+        bump = self.vsids.bump
+        current_level = len(self.decide_pos)
+        learn = [0]
+        pending = 0         # seen literals of the current level not resolved yet
+        index = len(trail) - 1
+        literal = 0
+        clause_index = conflict_index
+        while True:
+            if flags[clause_index] & LEARNED:
+                self.bump_clause(clause_index)
+            start = offsets[clause_index]
+            for other in literals[start:start + sizes[clause_index]]:
+                variable = abs(other)
+                if other != literal and not seen[variable] and level[variable] > 0:
+                    seen[variable] = 1
+                    bump(variable)
+                    if level[variable] >= current_level:
+                        pending += 1
+                    else:
+                        learn.append(other)
+            while not seen[abs(trail[index])]:
+                index -= 1
+            literal = trail[index]
+            index -= 1
+            seen[abs(literal)] = 0
+            pending -= 1
+            if pending == 0:
+                break
+            clause_index = reason[abs(literal)]
+        learn[0] = -literal
+        learn = self.minimize_clause(learn)
+
+        backjump_level = 0
+        for position in range(1, len(learn)):
+            if level[abs(learn[position])] > backjump_level:
+                backjump_level = level[abs(learn[position])]
+                learn[1], learn[position] = learn[position], learn[1]
+        return learn, backjump_level
+
+    def analyse_final(self, assumption):
+        # assumption is false while only assumptions are decided. Walk its implication graph
+        # back to the decisions: those assumptions and assumption itself are the core,
+        # the conjunction that has no model.
+        core = [assumption]
+        if self.level[abs(assumption)] == 0:
+            return core
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        literals = self.arena.literals
+        offsets = self.arena.offsets
+        sizes = self.arena.sizes
+        seen[abs(assumption)] = 1
+        for index in range(len(trail) - 1, self.decide_pos[0] - 1, -1):
+            variable = abs(trail[index])
+            if not seen[variable]:
+                continue
+            seen[variable] = 0
+            clause_index = reason[variable]
+            if clause_index < 0:
+                core.append(trail[index])       # decision, so an assumption
+                continue
+            start = offsets[clause_index]
+            for other in literals[start:start + sizes[clause_index]]:
+                if abs(other) != variable and level[abs(other)] > 0:
+                    seen[abs(other)] = 1
+        return core
+
+    def minimize_clause(self, learn):
+        # Drop the literals whose reason only contains literals of the clause, directly or
+        # through further reasons. Clears the seen marks analyse_conflict left behind.
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        to_clear = [abs(literal) for literal in learn[1:]]
+        abstract_levels = 0
+        for variable in to_clear:
+            abstract_levels |= 1 << (level[variable] & 31)
+        minimized = learn[:1]
+        for literal in learn[1:]:
+            if reason[abs(literal)] == -1 or not self.literal_redundant(literal, abstract_levels, to_clear):
+                minimized.append(literal)
+        for variable in to_clear:
+            seen[variable] = 0
+        self.minimized_count += len(learn) - len(minimized)
+        return minimized
+
+    def literal_redundant(self, literal, abstract_levels, to_clear):
+        # Depth first search through the reasons of literal. Every literal met has to be in
+        # the clause already or be redundant itself; a decision, or a level the clause has
+        # no literal of (checked on the abstract level bit mask), ends the search.
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        literals = self.arena.literals
+        offsets = self.arena.offsets
+        sizes = self.arena.sizes
+        top = len(to_clear)
+        stack = [abs(literal)]
+        while stack:
+            clause_index = reason[stack.pop()]
+            start = offsets[clause_index]
+            for other in literals[start + 1:start + sizes[clause_index]]:
+                variable = abs(other)
+                if not seen[variable] and level[variable] > 0:
+                    if reason[variable] != -1 and (1 << (level[variable] & 31)) & abstract_levels:
+                        seen[variable] = 1
+                        stack.append(variable)
+                        to_clear.append(variable)
+                    else:
+                        for variable in to_clear[top:]:
+                            seen[variable] = 0
+                        del to_clear[top:]
+                        return False
+        return True
+
+    def compute_lbd(self, clause):
+        # Literal block distance: number of distinct decision levels in the clause
+        level = self.level
+        return len({level[abs(literal)] for literal in clause})
+
+    def bump_clause(self, clause_index):
+        # Called for learned clauses used in conflict analysis: raise the activity, mark the
+        # clause as used and move it to a better tier when its LBD went down
+        arena = self.arena
+        arena.flags[clause_index] |= USED
+        arena.activity[clause_index] += self.clause_increment
+        if arena.activity[clause_index] > 1e20:
+            for index in range(len(arena.activity)):
+                arena.activity[index] *= 1e-20
+            self.clause_increment *= 1e-20
+        if arena.lbd[clause_index] > self.core_lbd:
+            lbd = self.compute_lbd(arena.clause(clause_index))
+            if lbd < arena.lbd[clause_index]:
+                arena.lbd[clause_index] = lbd
+
+    def over_budget(self):
+        if self.learned_count - self.last_reduce < 100:
+            return False        # let a reduction that freed too little settle first
+        if self.max_learned is not None and self.learned_live > self.max_learned:
             return True
-        return False
-    
-    def analyse_conflict(self, conflict_clause):
-        learn = []
-
-        for literal in conflict_clause:
-            if self.implications[-literal] == []:
-                learn.append(-literal)
-            learn += self.implications[-literal]
-
-        for i in range(len(learn)):
-            learn[i] = -learn[i]
-
-        return list(set(learn))
-
-    def backjump(self, learned_clause): 
-        self.imp_count += len(self.model) - len(self.decide_pos)
-        # Perform backjumping to a decision level
-        if not self.decide_pos:
-            return -1, -1
-        dec_level = self.decide_pos.pop()
-        literal = self.model[dec_level]
-        delete = self.model[dec_level+1:]
-        for lit in delete:
-            self.implications[lit] = []
-        self.add_implications(learned_clause, -literal)
-        del self.model[dec_level:]
-        return 0,-literal
+        return self.max_memory is not None and self.arena.memory_usage() > self.max_memory
+
+    def reduce_db(self):
+        # Delete the worst half of the local tier (highest LBD first, then lowest activity).
+        # Mid tier clauses unused since the last reduction are demoted into it; clauses that
+        # are the reason of a current assignment are kept. The arena is then compacted and
+        # the watch lists and reasons are rewritten to the new clause indices.
+        arena = self.arena
+        flags = arena.flags
+        lbd = arena.lbd
+        activity = arena.activity
+        literals = arena.literals
+        offsets = arena.offsets
+        reason = self.reason
+        value = self.value
+        candidates = []
+        for index in range(self.num_clauses, len(flags)):
+            if flags[index] & (LEARNED | DELETED) != LEARNED or lbd[index] <= self.core_lbd:
+                continue
+            used = flags[index] & USED
+            flags[index] &= ~USED
+            if lbd[index] <= self.mid_lbd and used:
+                continue
+            first = literals[offsets[index]]
+            if value[first] == 1 and reason[abs(first)] == index:
+                continue        # locked
+            candidates.append(index)
+        candidates.sort(key=lambda index: (-lbd[index], activity[index]))
+        for index in candidates[:len(candidates) // 2]:
+            arena.delete(index)
+        deleted = len(candidates) // 2
+        self.deleted_count += deleted
+        self.learned_live -= deleted
+        self.reduce_count += 1
+        self.last_reduce = self.learned_count
+        self.next_reduce = self.learned_count + self.reduce_interval + self.reduce_count * self.reduce_increment
+        if not deleted:
+            return
+        mapping = arena.compact()
+        for variable in range(1, self.num_vars + 1):
+            if reason[variable] >= 0:
+                reason[variable] = mapping[reason[variable]]
+        for watch_list in self.watches:
+            j = 0
+            for i in range(0, len(watch_list), 2):
+                clause_index = mapping[watch_list[i]]
+                if clause_index >= 0:
+                    watch_list[j] = clause_index
+                    watch_list[j + 1] = watch_list[i + 1]
+                    j += 2
+            del watch_list[j:]
+
+    def backjump(self, backjump_level):
+        self.imp_count += len(self.trail) - len(self.decide_pos)
+        # Undo every decision level above backjump_level
+        self.cancel_until(self.decide_pos[backjump_level])
+        del self.decide_pos[backjump_level:]
 
     def all_vars_assigned(self):        # Returns True if all variables already assigned , False otherwise
-        return len(self.model) >= self.num_vars
+        return len(self.trail) >= self.num_vars
     
     def assign(self,literal):             # Adds the decision literal to M and correponding update to decision level
-        self.decide_pos.append(len(self.model))
-        self.model.append(literal)
+        self.decide_pos.append(len(self.trail))
+        self.enqueue(literal)
         return
 
     def add_learned_clause(self, learned_clause):
         self.learned_count += 1
-        if len(learned_clause) == 0:
-            return
-        if len(learned_clause) == 1:
-            self.model.append(learned_clause[0])
-            self.clauses_literal_watched.append([learned_clause[0]])
-            self.literal_watch[learned_clause[0]].append(self.num_clauses)
-            self.clauses.append(learned_clause)
-            return
-        self.clauses_literal_watched.append([learned_clause[0],learned_clause[1]])
-        self.literal_watch[learned_clause[0]].append(self.num_clauses)
-        self.literal_watch[learned_clause[1]].append(self.num_clauses)
-        self.clauses.append(learned_clause)
-        return 
+        self.learned_live += 1
+        # analyse_conflict already put the asserting literal and the backjump level literal
+        # in the watch slots. Units are asserted on level 0 and never watched.
+        clause_index = self.arena.add_clause(learned_clause, LEARNED, self.compute_lbd(learned_clause))
+        self.clause_increment /= self.clause_decay
+        if len(learned_clause) > 1:
+            self.watch_clause(clause_index)
+        return clause_index
 
 
-    def solve(self, input_file_path):
-        # Solve the CNF formula using CDCL algorithm
-        start = time.time()
-        self.read_dimacs_cnf(input_file_path)
-        end = time.time()
-        read_time = end- start
+    def solve(self, input_file_path=None, assumptions=None, restart_policy='glucose', conflict_limit=None):
+        # Solve the CNF formula using CDCL algorithm. restart_policy is a name from
+        # restart.RESTART_POLICIES ('none', 'luby', 'glucose') or a policy object.
+        # The formula comes from input_file_path and/or add_clause(). solve() can be called
+        # again, with other assumptions or after more add_clause() calls; learned clauses,
+        # activities and phases carry over. Assumptions are literals decided before any
+        # other, so -1 with assumptions means no model contains all of them; self.core is
+        # then the subset of the assumptions that was needed to show it. With a
+        # conflict_limit the search gives up after that many conflicts and the model is None.
+        self.restart_policy = make_restart_policy(restart_policy)
+        assumptions = list(assumptions or [])
+        self.core = []
+        read_time = 0
+        if input_file_path is not None:
+            if self.initialized:
+                raise ValueError("The formula is already loaded, use add_clause() to extend it")
+            start = time.time()
+            added = self.clauses
+            self.read_dimacs_cnf(input_file_path)
+            self.clauses += added
+            end = time.time()
+            read_time = end - start
         start = time.time()
-        self.unit_propagate()
-        self.pure_literal_elimination()
-        if self.clauses == []:
-            print("solved!")
-            return self.model, self.restart_count, self.decide_count, self.imp_count, self.learned_count
-        if self.clauses == [[]]:
+        if not self.initialized:
+            self.freeze(assumptions)
+            self.init_search()
+        else:
+            self.restore(assumptions)
+        if not self.unsat:
+            self.ensure_vars(max(map(abs, assumptions), default=0))
+            if self.two_watch_propagate() is not None:  # units added since the last call
+                self.unsat = True
+        if self.unsat:
             return -1, self.restart_count, self.decide_count, self.imp_count, self.learned_count
-        self.back = self.model[:]
-        self.num_clauses = len(self.clauses)
-        self.vsids_init()
-        self.init_watch_list()
-        self.init_implication_list()
-        while not self.all_vars_assigned():
-            literal = self.vsids_decide()
-            self.decide_count += 1
-            self.assign(literal)
-            conflict_clause = self.two_watch_propagate(literal)
-
-            while conflict_clause is not None:
-                self.vsids_conflict(conflict_clause)
-                self.vsids_decay()
-                learned_clause = self.analyse_conflict(conflict_clause)
-                self.add_learned_clause(learned_clause)
-                status, unit = self.backjump(learned_clause) 
-            
-                if status == -1:
-                    return -1, self.restart_count, self.decide_count, self.imp_count, self.learned_count
-                
-                self.model.append(unit)
-                restart = self.random_restart()
-                if restart:
-                    conflict_clause = None
-                    continue
-                conflict_clause = self.two_watch_propagate(unit)
-
+        found = self.search(assumptions, None if conflict_limit is None else self.learned_count + conflict_limit)
+        if not found:
+            self.backtrack_to_root()
+            return (-1 if found is False else None), self.restart_count, self.decide_count, self.imp_count, self.learned_count
         end = time.time()
         solve_time = end - start
+        self.model = self.preprocessor.reconstruct(self.trail)
         verification_result = self.verify_solution()
+        self.backtrack_to_root()
         return self.model, self.restart_count, self.decide_count, self.imp_count, self.learned_count, verification_result, read_time, solve_time
 
+    def search(self, assumptions, conflict_limit=None):
+        # CDCL loop. Decision level i <= len(assumptions) holds assumptions[i - 1], or nothing
+        # when it was already true. Returns True with a complete assignment on the trail,
+        # False when there is none under the assumptions (self.unsat if none at all) and
+        # None once learned_count reached conflict_limit.
+        while True:
+            if conflict_limit is not None and self.learned_count >= conflict_limit:
+                return None
+            if self.restart_policy.should_restart():
+                self.restart()
+                if self.exchange is not None and not self.import_shared():
+                    self.unsat = True
+                    return False
+            if self.learned_count >= self.next_reduce or self.over_budget():
+                self.reduce_db()
+            literal = 0
+            while len(self.decide_pos) < len(assumptions):
+                assumption = assumptions[len(self.decide_pos)]
+                if self.value[assumption] == 1:
+                    self.decide_pos.append(len(self.trail))     # empty decision level
+                elif self.value[assumption] == -1:
+                    self.core = self.analyse_final(assumption)
+                    return False
+                else:
+                    literal = assumption
+                    break
+            if literal == 0:
+                if self.all_vars_assigned():
+                    return True
+                literal = self.vsids_decide()
+                if literal == 0:
+                    return True       # every variable that occurs in a clause is assigned
+            self.decide_count += 1
+            self.assign(literal)
+            conflict_index = self.two_watch_propagate()
+
+            while conflict_index is not None:
+                if not self.decide_pos:     # conflict without decisions
+                    self.unsat = True
+                    return False
+                learned_clause, backjump_level = self.analyse_conflict(conflict_index)
+                self.vsids_decay()
+                clause_index = self.add_learned_clause(learned_clause)
+                self.restart_policy.on_conflict(self.arena.lbd[clause_index])
+                if self.exchange is not None:
+                    self.exchange.export(learned_clause, self.arena.lbd[clause_index])
+                self.backjump(backjump_level)
+                self.enqueue(learned_clause[0], clause_index)
+                conflict_index = self.two_watch_propagate()
+
     def check_model_consistency(self):
         variables = set()
         for literal in self.model:
@@ -310,10 +723,13 @@ class CDCLSolver:
         next = self.check_model_consistency()
         if not next:
             return False
-        for clause in self.clauses:                   # for each clause
+        model = set(self.model)
+        # Against the input formula: the simplified one lost the clauses that level 0
+        # propagation satisfied or strengthened into units
+        for clause in self.original:                   # for each clause
             flag = False
             for literal in clause:
-                if literal in self.model:                 # atleast one literal should be true
+                if literal in model:                 # atleast one literal should be true
                     flag = True
                     break
             if not flag:
@@ -321,6 +737,13 @@ class CDCLSolver:
                 return False
         return True
 
+def format_preprocess_stats(stats):
+    return (f"removed {stats['clauses_before'] - stats['clauses_after']} of {stats['clauses_before']} clauses, "
+            f"{stats['variables_before'] - stats['variables_after']} of {stats['variables_before']} variables "
+            f"({stats['units']} units, {stats['failed_literals']} failed literals, {stats['subsumed']} subsumed, "
+            f"{stats['strengthened']} strengthened, {stats['eliminated']} eliminated, {stats['blocked']} blocked) "
+            f"in {stats['time']:.3f} seconds")
+
 def write_solution_to_file(file_path, outputs):
     # Write the solution to a file
     with open(file_path, "w") as file:
@@ -337,8 +760,10 @@ def write_solution_to_file(file_path, outputs):
         file.write("=============================================\n")
         file.write(f"# Restarts: {outputs['restart_count']}\n")
         file.write(f"# Learned Clauses: {outputs['learned_count']}\n")
+        file.write(f"# Minimized Literals: {outputs['minimized_count']} ({outputs['minimized_count'] / max(outputs['learned_count'], 1):.2f} per conflict)\n")
         file.write(f"# Decisions: {outputs['decide_count']}\n")
         file.write(f"# Implications: {outputs['imp_count']}\n")
+        file.write(f"# Preprocessing: {format_preprocess_stats(outputs['preprocess_stats'])}\n")
         file.write("=============================================\n")
         file.write(f"Read time: {outputs['read_time']} seconds\n")
         file.write(f"Solve time: {outputs['solve_time']} seconds\n")
@@ -353,6 +778,8 @@ def main(input_file_path):
         'decide_count': decide_count,
         'imp_count': imp_count,
         'learned_count': learned_count,
+        'minimized_count': solver.minimized_count,
+        'preprocess_stats': solver.preprocessor.stats,
         'verification_result': verification_result,
         'read_time': read_time,
         'solve_time': solve_time,
@@ -374,8 +801,10 @@ def main(input_file_path):
     print("=============================================")
     print(f"# Restarts: {restart_count}")
     print(f"# Learned Clauses: {learned_count}")
+    print(f"# Minimized Literals: {solver.minimized_count} ({solver.minimized_count / max(learned_count, 1):.2f} per conflict)")
     print(f"# Decisions: {decide_count}")
     print(f"# Implications: {imp_count}")
+    print(f"# Preprocessing: {format_preprocess_stats(solver.preprocessor.stats)}")
     print("=============================================")
     print(f"Read time: {read_time} seconds")
     print(f"Solve time: {solve_time} seconds")
@@ -1,6 +1,7 @@
 import os
 import time
 import random
+from cnf_cache import load_cached
 
 class CDCLSolver:
     def __init__(self):
@@ -21,17 +22,7 @@ class CDCLSolver:
         self.model = []
 
     def read_dimacs_cnf(self, file_path):
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(file_path)
         self.clauses_original = self.clauses[:]
     
     def find_unit_clause(self):
@@ -1,34 +1,203 @@
+import multiprocessing
 import time
+from collections import deque
+from multiprocessing import Pool, Process, cpu_count
+from queue import Empty, Queue
 from Cubing_draft1 import Look_ahead_Solver
 from Conquer_draft1 import CDCLSolver
 
+POLL_INTERVAL = 0.05    # seconds the dispatcher waits for a result before looking for new cubes
+STOP_CHECK = 1000       # conflicts a conquer worker runs between looks at the stop flag
+
+
+def _produce_cubes(file_path, cubes):
+    # Cuber process: runs the look-ahead and puts every cube on the bounded queue as soon as
+    # it is made, blocking while the queue is full; None marks the end of the tree
+    for cube in Look_ahead_Solver().generate_cubes(file_path):
+        cubes.put(cube)
+    cubes.put(None)
+
+
+# Conquer workers: every process of the pool holds the formula and one warm CDCLSolver,
+# set up once by the pool initializer, and solves the cubes it is sent as assumptions.
+# A cube still open after its conflict budget is split by a look-ahead step instead.
+# Once the stop flag is set the workers drop their cube, so the pool can be closed and
+# joined instead of terminated: a worker killed while it writes a result holds the lock
+# of the result queue and hangs the pool.
+_clauses = None
+_solver = None
+_splitter = None
+_stop = None
+_cores = set()
+
+
+def _init_worker(clauses, stop):
+    global _clauses, _solver, _splitter, _stop
+    _clauses = clauses
+    _solver = CDCLSolver()
+    _splitter = Look_ahead_Solver()
+    _stop = stop
+
+
+def _solve(cube, conflict_budget=None):
+    # Solve the cube in steps of STOP_CHECK conflicts. The model, -1, or None once the
+    # budget ran out or the stop flag was set.
+    spent = 0
+    while True:
+        limit = STOP_CHECK if conflict_budget is None else min(STOP_CHECK, conflict_budget - spent)
+        model = _solver.solve(_clauses, cube, limit)[0]
+        spent += limit
+        if model is not None or _stop.is_set() or (conflict_budget is not None and spent >= conflict_budget):
+            return model
+
+
+def _conquer(cube, cores, conflict_budget):
+    # Solve one cube. cores are the refuted cores known when it was sent; the ones this
+    # worker has not seen yet are added as clauses first. Returns the model (-1 when the
+    # cube is refuted, None when it was split), the core of a refuted cube, the child
+    # cubes of a split with their budgets, twice this one, and the counters spent on it.
+    if _stop.is_set():
+        return cube, None, None, [], [0, 0, 0, 0]
+    for core in cores:
+        if core not in _cores:
+            _cores.add(core)
+            if core:
+                _solver.add_clause([-literal for literal in core])
+    before = (_solver.imp_count, _solver.restart_count, _solver.decide_count, _solver.learned_count)
+    model = _solve(cube, conflict_budget)
+    core = frozenset(_solver.core) if model == -1 else None
+    children = []
+    if model is None and not _stop.is_set():
+        children = _splitter.split(_clauses, cube)
+        if not children:
+            model = -1      # both branches refuted by propagation
+            core = frozenset(cube)      # the budgeted solve left no core
+        elif any(len(child) <= len(cube) for child in children):
+            model = _solve(cube)     # nothing left to split on
+            core = frozenset(_solver.core) if model == -1 else None
+            children = []
+        children = [(child, 2 * conflict_budget) for child in children]
+    after = (_solver.imp_count, _solver.restart_count, _solver.decide_count, _solver.learned_count)
+    spent = [now - then for now, then in zip(after, before)]
+    return cube, model, core, children, spent
+
+
 class Cube_and_Conquer_solver:
-    def __init__(self):
+    # conflict_budget: conflicts a cube may take before it is split further, None for no
+    # limit. Cubes made by a split get twice the budget of their parent.
+    def __init__(self, workers=None, conflict_budget=1000):
         self.look_ahead_solver = Look_ahead_Solver()
-        self.cdcl_solver = CDCLSolver()
+        self.workers = workers or cpu_count()
+        self.conflict_budget = conflict_budget
         self.clauses = []
         self.total_implication_count = 0
         self.total_restart_count = 0
         self.total_decide_count = 0
         self.total_learned_count = 0
         self.model = []
+        # Refuted cubes leave the subset of their literals the refutation used; a later cube
+        # containing one of these cores is refuted too and is skipped
+        self.cores = []
+        self.pruned_count = 0
+        self.split_count = 0
+        self.cube_count = 0
 
     def solve(self, file_path):
-        self.clauses, cubes = self.look_ahead_solver.solve(file_path)
-        clauses = self.clauses[:]
-        for cube in cubes:
-            model, restart_count, decide_count, imp_count, learned_count = self.cdcl_solver.solve(clauses, cube)
-            self.total_implication_count = imp_count 
-            self.total_restart_count = restart_count
-            self.total_decide_count = decide_count
-            self.total_learned_count = learned_count
-            self.model = cube[1] + model
-            if model == -1:
-                print("Failed to solve cube.")
-            else:
-                return self.model,self.total_implication_count, self.total_restart_count, self.total_decide_count, self.total_learned_count
+        # Cubing and conquering run at the same time: a cuber process puts its cubes on a
+        # bounded queue while the look-ahead tree is still being built, and they go on to a
+        # pool of conquer processes, at most two per worker in flight so the cores of
+        # refuted cubes can still prune the cubes not sent yet. Results are taken in
+        # completion order; the first SAT cube stops the pool workers, terminates the cuber
+        # and ends all other work. The children of a split cube go to the front of the shared work queue, so
+        # the next idle worker takes over part of the hard cube.
+        # Cube variables are not frozen, they are not known in advance; the conquer solvers
+        # restore whatever their preprocessing eliminated once a cube assumes it.
+        self.look_ahead_solver.read_dimacs_cnf(file_path)
+        self.clauses = self.look_ahead_solver.clauses
+        cube_queue = multiprocessing.Queue(2 * self.workers)
+        cuber = Process(target=_produce_cubes, args=(file_path, cube_queue), daemon=True)
+        results = Queue()
+        stop = multiprocessing.Event()
+        self.model = -1
+        cuber.start()
+        try:
+            with Pool(self.workers, _init_worker, (self.clauses, stop)) as pool:
+                try:
+                    self.conquer(pool, cube_queue, cuber, results)
+                finally:
+                    stop.set()
+                    pool.close()
+                    pool.join()
+        finally:
+            if cuber.is_alive():
+                cuber.terminate()
+            cuber.join()
         return self.model, self.total_implication_count, self.total_restart_count, self.total_decide_count, self.total_learned_count
 
+    def next_cube(self, cube_queue, cuber, wait):
+        # The next cube from the cuber, None when it has none ready (or within POLL_INTERVAL
+        # if wait), False once the tree is complete
+        try:
+            cube = cube_queue.get(timeout=POLL_INTERVAL) if wait else cube_queue.get_nowait()
+        except Empty:
+            if not cuber.is_alive() and cube_queue.empty():
+                return False        # the cuber died before finishing the tree
+            return None
+        if cube is None:
+            return False
+        self.cube_count += 1
+        return cube
+
+    def conquer(self, pool, cube_queue, cuber, results):
+        pending = deque()
+        cubing = True
+        in_flight = 0
+        while True:
+            while in_flight < 2 * self.workers:
+                if pending:
+                    cube, budget = pending.popleft()
+                elif cubing:
+                    cube = self.next_cube(cube_queue, cuber, wait=in_flight == 0)
+                    if cube is False:
+                        cubing = False
+                        break
+                    if cube is None:
+                        break
+                    budget = self.conflict_budget
+                else:
+                    break
+                if any(core <= set(cube) for core in self.cores):
+                    self.pruned_count += 1
+                    continue
+                pool.apply_async(_conquer, (cube, self.cores[:], budget), callback=results.put,
+                                 error_callback=results.put)
+                in_flight += 1
+            if in_flight == 0:
+                if not cubing and not pending:
+                    return
+                continue
+            try:
+                result = results.get(timeout=POLL_INTERVAL)
+            except Empty:
+                continue
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+            cube, model, core, children, spent = result
+            self.total_implication_count += spent[0]
+            self.total_restart_count += spent[1]
+            self.total_decide_count += spent[2]
+            self.total_learned_count += spent[3]
+            if model is None:
+                self.split_count += 1
+                pending.extendleft(reversed(children))
+                continue
+            if model != -1:
+                self.model = model      # already contains the cube literals
+                return
+            print("Failed to solve cube.")
+            self.cores.append(core)
+
     def verify_solution(self, model):
         # Verify the solution
         for clause in self.clauses :                   # for each clause
@@ -63,11 +232,16 @@ def main():
     start = time.time()
     model, total_implication_count, total_restart_count, total_decide_count, total_learned_count = solver.solve(file_path)
     end  = time.time()
-    verified = solver.verify_solution(model)
+    # An UNSAT answer has no assignment to verify
+    verified = model == -1 or solver.verify_solution(model)
     if verified:
-        print()
-        print("Assignment verified: True")
+        if model != -1:
+            print()
+            print("Assignment verified: True")
         print_statistics(model, total_implication_count, total_restart_count, total_decide_count, total_learned_count)
+        print(f"# Cubes pruned by refuted cores : {solver.pruned_count}")
+        print(f"# Cubes split after their conflict budget : {solver.split_count}")
+        print(f"# Cubes generated before the answer : {solver.cube_count}")
     else:
         print("Assignment verified: False")
     print(f"Total time taken to find a solution: {end - start} seconds")
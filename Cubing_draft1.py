@@ -1,58 +1,221 @@
+import heapq
 import sys
 import time 
 from collections import defaultdict
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import multiprocessing
+from array import array
+from itertools import chain
+from multiprocessing import Pool
+from cnf_cache import load_cached
+from cnf_loader import normalize_clause
+
+# Candidate preselection measures, over the literal scores kept by update_scores()
+PRESELECTIONS = ('jw', 'propz', 'reduction')
+MAX_CANDIDATES = 64
+
+# Probe workers: every process of the pool holds its own look-ahead state over the formula,
+# set up once by the pool initializer. A task is the prober's current assignment plus the
+# candidates to probe under it, with the binary clauses learned on the way there.
+_prober = None
+
+
+def _init_prober(formula):
+    global _prober
+    _prober = Look_ahead_Solver()
+    _prober.init_trail(formula)
+
+
+def _probe_candidates(assignment, learned, literals):
+    _prober.set_learned(learned)
+    _prober.set_assignment(assignment)
+    return [(_prober.probe(literal), _prober.probe(-literal)) for literal in literals]
+
 
 class Look_ahead_Solver:
-    def __init__(self):
+    # probe_workers: probe the candidates of every node on a pool of that many processes
+    # (only worth it when probes are expensive, i.e. on large formulas)
+    # double_budget: number of probes per node the double look-ahead may spend under
+    # promising probes, 0 to turn it off
+    # preselect: measure that picks the candidates of a node, one of PRESELECTIONS: 'jw'
+    # (Jeroslow-Wang score of the literal), 'propz' (variables in binary clauses of both
+    # signs) or 'reduction' (product of the clause reductions of both signs)
+    # candidates, candidates_per_level: number of candidates at the root and how many more
+    # per level of the cube tree, never more than MAX_CANDIDATES
+    # forest_candidates: probe along the implication forest of the candidates at nodes with
+    # at least this many candidates, None (the default) to probe them one by one. On the
+    # instances measured the forest costs more than the propagation it saves.
+    def __init__(self, probe_workers=None, double_budget=0, preselect='jw', candidates=5, candidates_per_level=0,
+                 forest_candidates=None):
+        if preselect not in PRESELECTIONS:
+            raise ValueError(f"Unknown preselection: {preselect}")
         self.clauses = []
         self.num_vars = 0
         self.num_clauses = 0
         self.num_cubes = 0
         self.cubes = []
+        self.satisfied = False          # the last cube made satisfies the formula
+        self.formula = None
+        self.probe_workers = probe_workers
+        self.double_budget = double_budget
+        self.preselect = preselect
+        self.candidates = candidates
+        self.candidates_per_level = candidates_per_level
+        self.forest_candidates = forest_candidates
+        self.pool = None
         self.executor = ThreadPoolExecutor()
     
     def read_dimacs_cnf(self, file_path):
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(file_path)
     
-    def find_unit_clause(self, formula):
-        for clause in formula:
-            if len(clause) == 1:
-                return clause[0]
-        return 0
-
-    def unit_propagate(self, formula, model=[]):
-        unit_clause = self.find_unit_clause(formula)
-        while unit_clause != 0:
-            new_unit_clause = 0
-            new_formula = []
-            for clause in formula:
-                if unit_clause in clause:
+    def init_trail(self, formula):
+        # Look-ahead state over formula: occurrence lists, per clause the number of true and
+        # of unassigned literals, the literal-indexed values and the trail of assignments.
+        # Probes assign on the trail and are undone by truncating it, so a probe costs what
+        # it propagates instead of a copy of the formula. Binary clauses learned by the
+        # look-ahead are kept apart, as implication lists, on a stack of their own. Returns
+        # False if the unit clauses of formula already conflict.
+        self.formula = formula
+        self.trail_clauses = [clause for clause in map(normalize_clause, formula) if clause is not None]
+        num_vars = max(self.num_vars, max(map(abs, chain.from_iterable(self.trail_clauses)), default=0))
+        self.num_vars = num_vars
+        self.occurs = [[] for _ in range(2 * num_vars + 1)]
+        for index, clause in enumerate(self.trail_clauses):
+            for literal in clause:
+                self.occurs[literal].append(index)
+        self.value = array('b', bytes(2 * num_vars + 1))
+        self.true_count = array('i', bytes(4 * len(self.trail_clauses)))
+        self.free_count = array('i', map(len, self.trail_clauses))
+        self.open_clauses = len(self.trail_clauses)     # clauses not satisfied: the residual formula
+        self.trail = []
+        self.qhead = 0
+        self.implications = [[] for _ in range(2 * num_vars + 1)]
+        self.learned = []
+        self.learned_set = set()
+        self.score_stack = []
+        self.depth = 0
+        if any(not clause for clause in self.trail_clauses):
+            return False
+        return all(self.propagate(clause[0]) for clause in self.trail_clauses if len(clause) == 1)
+
+    def assign(self, literal):
+        self.value[literal] = 1
+        self.value[-literal] = -1
+        self.trail.append(literal)
+        true_count = self.true_count
+        for index in self.occurs[literal]:
+            true_count[index] += 1
+            if true_count[index] == 1:
+                self.open_clauses -= 1
+
+    def propagate(self, literal):
+        # Assign literal and unit propagate. Returns False on a conflict; the assignments
+        # stay on the trail either way, undo() takes them back.
+        value = self.value
+        if value[literal]:
+            return value[literal] == 1
+        self.assign(literal)
+        trail = self.trail
+        true_count = self.true_count
+        free_count = self.free_count
+        clauses = self.trail_clauses
+        implications = self.implications
+        conflict = False
+        while self.qhead < len(trail) and not conflict:
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+            # Every counter of the literal is updated even after a conflict, undo() relies on it
+            for index in self.occurs[false_literal]:
+                free_count[index] -= 1
+                if true_count[index] or conflict:
                     continue
-                elif -unit_clause in clause:
-                    clause = [lit for lit in clause if lit != -unit_clause]
-                if clause == []:
-                    return [[]], []
-                if len(clause) == 1:
-                    new_unit_clause = clause[0]
-                new_formula.append(clause)
-            formula = new_formula
-            if unit_clause not in model:
-                model.append(unit_clause)
-            unit_clause = new_unit_clause
-        return formula, model
+                if free_count[index] == 0:
+                    conflict = True
+                elif free_count[index] == 1:
+                    for unit in clauses[index]:
+                        if value[unit] == 0:
+                            self.assign(unit)
+                            break
+            if conflict:
+                break
+            for implied in implications[-false_literal]:
+                if value[implied] == 0:
+                    self.assign(implied)
+                elif value[implied] < 0:
+                    conflict = True
+                    break
+        return not conflict
+
+    def learn(self, first, second):
+        # Add the binary clause (first or second), implied by the formula under the current
+        # trail; it has to be forgotten when the trail is undone below where it was learned
+        key = (first, second) if first < second else (second, first)
+        if key in self.learned_set:
+            return
+        self.learned_set.add(key)
+        self.learned.append(key)
+        self.implications[-first].append(second)
+        self.implications[-second].append(first)
+
+    def forget(self, count):
+        # Drop the learned binary clauses past the first count
+        learned = self.learned
+        implications = self.implications
+        while len(learned) > count:
+            first, second = learned.pop()
+            self.learned_set.discard((first, second))
+            implications[-second].pop()
+            implications[-first].pop()
+
+    def set_learned(self, learned):
+        # Make the learned binary clauses those of another look-ahead state
+        common = 0
+        limit = min(len(self.learned), len(learned))
+        while common < limit and self.learned[common] == learned[common]:
+            common += 1
+        self.forget(common)
+        for first, second in learned[common:]:
+            self.learn(first, second)
+
+    def set_assignment(self, literals):
+        # Make the trail literals, the trail of another look-ahead state over the same
+        # formula: the common prefix stays, the rest is assigned without propagating again
+        trail = self.trail
+        common = 0
+        limit = min(len(trail), len(literals))
+        while common < limit and trail[common] == literals[common]:
+            common += 1
+        self.undo(common)
+        free_count = self.free_count
+        for literal in literals[common:]:
+            self.assign(literal)
+            for index in self.occurs[-literal]:
+                free_count[index] -= 1
+        self.qhead = len(trail)
+
+    def undo(self, position):
+        # Take back the assignments from trail[position] on
+        value = self.value
+        true_count = self.true_count
+        free_count = self.free_count
+        occurs = self.occurs
+        trail = self.trail
+        for index in range(len(trail) - 1, position - 1, -1):
+            literal = trail[index]
+            if index < self.qhead:
+                for clause_index in occurs[-literal]:
+                    free_count[clause_index] += 1
+            for clause_index in occurs[literal]:
+                true_count[clause_index] -= 1
+                if true_count[clause_index] == 0:
+                    self.open_clauses += 1
+            value[literal] = value[-literal] = 0
+        del trail[position:]
+        self.qhead = min(self.qhead, position)
+        score_stack = self.score_stack
+        while score_stack and score_stack[-1][0] > position:
+            score_stack.pop()
 
     # @staticmethod
     # def pure_literal_elimination(formula, model):
@@ -76,147 +239,330 @@ class Look_ahead_Solver:
     #                 continue
     #             literal_watch[literal] += [x]
 
-    def is_formula_easy(self, formula, model):
+    def is_formula_easy(self):
+        # Clause to free variable ratio of the residual formula far from the 3-SAT threshold
         threshold = 4.3
-        ratio = len(formula) / (self.num_vars - len(model))
+        ratio = self.open_clauses / (self.num_vars - len(self.trail))
         if ratio < threshold - 0.7 or ratio > threshold+1.5:
             self.num_cubes += 1
             return True
         return False
 
-    def CDCL_solve(self, model):
-        self.cubes.append(model)
-        return False, []
-    
-    def select_candidate_literals(self, formula):
-        # Branching Heuristics?
-        # Use Machine learning to select candidates
-        # Jeroslow-Wang Heuristic
-        jw_scores = defaultdict(float)
-        for clause in formula:
-            for literal in clause:
-                jw_scores[literal] += 2**-len(clause)
-                
-        # Sort the literals based on their Jeroslow-Wang scores in descending order
-        sorted_literals = sorted(jw_scores, key=jw_scores.get, reverse=True)
-        
-        # Return the top 5 literals
-        return sorted_literals[:5]
-
-    def compute_score(self, formula, subformula, model, new_model):
-        return (len(formula)/len(subformula))*((len(new_model)+1)/(len(model)+1))
-
-    def look_ahead(self, formula, literals, model):
+    def update_scores(self):
+        # Per literal Jeroslow-Wang score over the residual formula and number of binary
+        # clauses of the residual formula, literal-indexed, for the current trail (after
+        # propagation). They are kept on a stack by trail length, so a node starts from the
+        # scores of its closest scored ancestor and only redoes the clauses its new
+        # assignments touched; undo() drops the scores of the trails it takes back. The
+        # weights are powers of two, so the sums stay exact.
+        trail = self.trail
+        value = self.value
+        true_count = self.true_count
+        free_count = self.free_count
+        clauses = self.trail_clauses
+        stack = self.score_stack
+        if stack and stack[-1][0] == len(trail):
+            return stack[-1][1], stack[-1][2]
+        if stack:
+            position, jw, binary = stack[-1]
+            jw = array('d', jw)
+            binary = array('i', binary)
+            assigned = set(trail[position:])
+            touched = set()
+            for literal in assigned:
+                touched.update(self.occurs[literal])
+                touched.update(self.occurs[-literal])
+        else:
+            jw = array('d', bytes(8 * len(value)))
+            binary = array('i', bytes(4 * len(value)))
+            assigned = ()
+            touched = [index for index in range(len(clauses)) if not true_count[index]]
+        for index in touched:
+            clause = clauses[index]
+            if assigned:
+                # Take back what the clause gave before the new assignments
+                old_true = true_count[index] - sum(1 for literal in clause if literal in assigned)
+                if old_true == 0:
+                    old_free = free_count[index] + sum(1 for literal in clause if -literal in assigned)
+                    weight = 2**-old_free
+                    for literal in clause:
+                        if value[literal] == 0 or literal in assigned or -literal in assigned:
+                            jw[literal] -= weight
+                            if old_free == 2:
+                                binary[literal] -= 1
+            if true_count[index] == 0:
+                weight = 2**-free_count[index]
+                for literal in clause:
+                    if value[literal] == 0:
+                        jw[literal] += weight
+                        if free_count[index] == 2:
+                            binary[literal] += 1
+        stack.append((len(trail), jw, binary))
+        return jw, binary
+
+    def select_candidate_literals(self):
+        # Top candidates of the node by the preselection measure, picked with a heap
+        jw, binary = self.update_scores()
+        count = min(MAX_CANDIDATES, self.candidates + int(self.candidates_per_level * self.depth))
+        size = len(jw)
+        num_vars = self.num_vars
+        if self.preselect == 'jw':
+            best = heapq.nlargest(count, range(1, size), key=jw.__getitem__)
+            return [literal if literal <= num_vars else literal - size for literal in best if jw[literal] > 0]
+        if self.preselect == 'propz':
+            # Variables with binary clauses of both signs, most first, then by Jeroslow-Wang
+            measure = lambda variable: (binary[variable] * binary[-variable], jw[variable] + jw[-variable])
+            first = lambda variable: variable if binary[variable] >= binary[-variable] else -variable
+        else:
+            # Clause reduction approximation: a literal shortens the clauses of its negation,
+            # its binary clauses into units, and the variable is as good as its worse sign
+            reduction = lambda literal: jw[-literal] + binary[-literal]
+            measure = lambda variable: reduction(variable) * reduction(-variable)
+            first = lambda variable: variable if reduction(variable) >= reduction(-variable) else -variable
+        best = heapq.nlargest(count, range(1, num_vars + 1), key=measure)
+        return [first(variable) for variable in best if jw[variable] + jw[-variable] > 0]
+
+    def compute_score(self, clauses, subclauses, assigned, new_assigned):
+        return (clauses/subclauses)*((new_assigned+1)/(assigned+1))
+
+    def probe(self, literal):
+        # Residual clauses, assignments and the literals implied after literal (literal
+        # included), None on a conflict
+        position = len(self.trail)
+        result = (self.open_clauses, len(self.trail), self.trail[position:]) if self.propagate(literal) else None
+        self.undo(position)
+        return result
+
+    def implication_forest(self, literals):
+        # Parent of every literal that implies another one of literals through a binary
+        # clause of the residual formula or a learned one, without cycles
+        members = set(literals)
+        parent = {}
+        value = self.value
+        for literal in literals:
+            implied = [other for other in self.implications[literal] if other in members]
+            for index in self.occurs[-literal]:
+                if self.true_count[index] == 0 and self.free_count[index] == 2:
+                    implied.extend(other for other in self.trail_clauses[index]
+                                   if other != -literal and value[other] == 0 and other in members)
+            for other in implied:
+                ancestor = other
+                while ancestor in parent and ancestor != literal:
+                    ancestor = parent[ancestor]
+                if ancestor != literal:
+                    parent[literal] = other
+                    break
+        return parent
+
+    def probe_subtree(self, literal, children, results, base):
+        # Probe literal and, on top of it, the literals of the implication forest that
+        # imply it: they share its propagation and fail with it
+        position = len(self.trail)
+        if self.propagate(literal) and (not self.double_left or self.double_look_ahead(literal, base)):
+            results[literal] = (self.open_clauses, len(self.trail), self.trail[base:])
+            for child in children.get(literal, ()):
+                self.probe_subtree(child, children, results, base)
+        else:
+            failed = [literal]
+            while failed:
+                results[failed[-1]] = None
+                failed.extend(children.get(failed.pop(), ()))
+        self.undo(position)
+
+    def double_look_ahead(self, literal, base):
+        # Second level probes under a probe at least as good as the best one so far at the
+        # node: a candidate that fails under literal is fixed to its other sign on top of it
+        # and the binary clause is learned, and literal fails if a candidate fails both
+        # ways. Returns False if literal failed.
+        if self.open_clauses == 0:
+            return True
+        score = self.compute_score(self.probe_clauses, self.open_clauses, base, len(self.trail))
+        if score < self.best_probe:
+            return True
+        self.best_probe = score
+        for other in self.probe_literals:
+            if self.double_left <= 0:
+                break
+            if self.value[other]:
+                continue
+            self.double_left -= 2
+            positive, negative = self.probe(other), self.probe(-other)
+            if positive is None and negative is None:
+                return False
+            if positive is None or negative is None:
+                fixed = -other if positive is None else other
+                self.learn(-literal, fixed)
+                if not self.propagate(fixed):
+                    return False
+        return True
+
+    def probe_candidates(self, literals):
+        # (positive, negative) probe results per candidate. Without a pool both signs of
+        # the candidates are probed, along their implication forest when there are at least
+        # forest_candidates of them, a tree when one of its literals is asked for, so
+        # look_ahead() can still stop early.
+        if self.pool is None:
+            probes = [sign * literal for literal in literals for sign in (1, -1)]
+            forest = self.forest_candidates is not None and len(literals) >= self.forest_candidates
+            parent = self.implication_forest(probes) if forest else {}
+            children = defaultdict(list)
+            for literal in probes:
+                if literal in parent:
+                    children[parent[literal]].append(literal)
+            results = {}
+            base = len(self.trail)
+            self.probe_clauses = self.open_clauses
+            self.probe_literals = literals
+            self.double_left = self.double_budget
+            self.best_probe = 0
+            for literal in literals:
+                for probed in (literal, -literal):
+                    if probed not in results:
+                        root = probed
+                        while root in parent:
+                            root = parent[root]
+                        self.probe_subtree(root, children, results, base)
+                yield results[literal], results[-literal]
+            return
+        # With a pool the candidates go out in one batch per worker, so the assignment and
+        # the learned clauses are sent once per worker, not once per candidate
+        assignment = self.trail
+        learned = self.learned
+        size = -(-len(literals) // self.probe_workers)
+        batches = [(assignment, learned, literals[start:start + size]) for start in range(0, len(literals), size)]
+        for results in self.pool.starmap(_probe_candidates, batches):
+            yield from results
+
+    def look_ahead(self, literals):
+        # Probe both signs of every candidate and return the branches to explore, best
+        # first, and a branch that satisfies the formula first. What the probes find is
+        # kept at the node: a failed literal is fixed to its other sign, a literal implied
+        # by both signs of a candidate is fixed, and a probe of literal that implies another
+        # candidate's literal x learns the binary clause (-literal or x). After a fixing the
+        # candidates are probed again under the new trail, replacing those that got assigned.
+        # Returns None if the node is refuted and no branches if the fixings satisfy the
+        # formula; the fixings stay on the trail and the learned clauses on their stack for
+        # the caller to undo and forget.
+        value = self.value
+        while True:
+            candidates = [literal for literal in literals if value[literal] == 0]
+            if not candidates:
+                candidates = literals = self.select_candidate_literals()
+                if not candidates:
+                    return []
+            variables = {abs(literal) for literal in candidates}
+            probed = []
+            fixed = False
+            for literal, (positive, negative) in zip(candidates, self.probe_candidates(candidates)):
+                if positive is None and negative is None:
+                    return None
+                elif positive is None or negative is None:
+                    if not self.propagate(-literal if positive is None else literal):
+                        return None
+                    fixed = True
+                    break
+                elif positive[0] == 0:
+                    return [literal, -literal]
+                elif negative[0] == 0:
+                    return [-literal, literal]
+                for implied in positive[2]:
+                    if abs(implied) in variables and implied != literal:
+                        self.learn(-literal, implied)
+                for implied in negative[2]:
+                    if abs(implied) in variables and implied != -literal:
+                        self.learn(literal, implied)
+                necessary = set(positive[2]).intersection(negative[2])
+                if necessary:
+                    if not all(self.propagate(implied) for implied in necessary):
+                        return None
+                    fixed = True
+                    break
+                probed.append((literal, positive, negative))
+            if not fixed:
+                break
+        clauses, assigned = self.open_clauses, len(self.trail)
         best_score = 0
         best_output = []
-        for literal in literals:
-            model_pos = model[:]
-            model_neg = model[:]
-            formula_pos, model_pos = self.unit_propagate(formula+[[literal]], model_pos)
-            formula_neg, model_neg = self.unit_propagate(formula+[[-literal]], model_neg)
-            if formula_pos == [[]] and formula_neg == [[]]:
-                return [[]], [], [[]], []
-            elif formula_pos == [[]]:
-                return [[]], [], formula_neg, model_neg
-            elif formula_neg == [[]]:
-                return formula_pos, model_pos, [[]], []
-            elif formula_pos == []:
-                return formula_pos, model_pos, formula_neg, model_neg
-            elif formula_neg == []:
-                return formula_neg, model_neg, formula_pos, model_pos
-            else:
-                score_pos = self.compute_score(formula, formula_pos, model, model_pos)
-                score_neg = self.compute_score(formula, formula_neg, model, model_neg)
-                if score_pos > best_score:
-                    best_score = score_pos
-                    best_output = [formula_pos, model_pos, formula_neg, model_neg] 
-                if score_neg > best_score:
-                    best_score = score_neg
-                    best_output = [formula_neg, model_neg, formula_pos, model_pos]
-        return best_output[0], best_output[1], best_output[2], best_output[3]
-    # def look_ahead_helper(self, args):
-    #     formula, literal, model = args
-    #     model_pos = model[:]
-    #     model_neg = model[:]
-
-    #     # Submitting unit_propagate function calls to the ThreadPoolExecutor
-    #     future_pos = self.executor.submit(self.unit_propagate, formula + [[literal]], model[:])
-    #     future_neg = self.executor.submit(self.unit_propagate, formula + [[-literal]], model[:])
-
-    #     # Getting results from the futures
-    #     formula_pos, model_pos = future_pos.result()
-    #     formula_neg, model_neg = future_neg.result()
-
-    #     if formula_pos == [[]] and formula_neg == [[]]:
-    #         return float('inf'), [[[]], [], [[]], []]
-    #     elif formula_pos == [[]]:
-    #         return float('inf'), [[[]], [], formula_neg, model_neg]
-    #     elif formula_neg == [[]]:
-    #         return float('inf'), [formula_pos, model_pos, [[]], []]
-    #     elif formula_pos == []:
-    #         return float('inf'), [[], [], [[]], []]
-    #     elif formula_neg == []:
-    #         return float('inf'), [[[]], [], [], []]
-        
-    #     score_pos = self.compute_score(formula, formula_pos, model, model_pos)
-    #     score_neg = self.compute_score(formula, formula_neg, model, model_neg)
-        
-    #     if score_pos >= score_neg:
-    #         score = score_pos 
-    #         output = [formula_pos, model_pos,  formula_neg, model_neg]
-    #     else:
-    #         score = score_neg
-    #         output = [formula_neg, model_neg, formula_pos, model_pos]
-    #     return score, output
-
-    # def look_ahead(self, formula, literals, model):
-    #     arguments = [(formula, literal, model) for literal in literals]
-    #     futures = [self.executor.submit(self.look_ahead_helper, arg) for arg in arguments]
-        
-    #     best_score = 0
-    #     best_output = []
-
-    #     for future in as_completed(futures):
-    #         score, output = future.result()
-    #         if score == float('inf'):
-    #             return output[0], output[1], output[2], output[3]
-    #         if score > best_score:
-    #             best_score = score
-    #             best_output = output
-    #     return best_output[0], best_output[1], best_output[2], best_output[3]
-
-    def look_ahead_dpll(self, formula, model = []):
-        formula, model = self.unit_propagate(formula, model)
-        # formula = self.pure_literal_elimination(formula, model)
-        if formula == []:
-            return True, model
-        if formula == [[]]:
-            return False, []
-        if self.is_formula_easy(formula, model):
-            return self.CDCL_solve(model)
-        literals = self.select_candidate_literals(formula)
-        best_formula, best_model, alternative_formula, alternative_model = self.look_ahead(formula, literals, model)
-
-        sat, model = self.look_ahead_dpll(best_formula, best_model)
-        if sat:
-            return True, model
-        
-        sat, model = self.look_ahead_dpll(alternative_formula,alternative_model)
-        if sat:
-            return True, model
-        
-        return False, []
+        for literal, positive, negative in probed:
+            score_pos = self.compute_score(clauses, positive[0], assigned, positive[1])
+            score_neg = self.compute_score(clauses, negative[0], assigned, negative[1])
+            if score_pos > best_score:
+                best_score = score_pos
+                best_output = [literal, -literal]
+            if score_neg > best_score:
+                best_score = score_neg
+                best_output = [-literal, literal]
+        return best_output
+
+    def split(self, formula, cube):
+        # One look-ahead step on the formula under cube: the cubes of the two branches that
+        # are not refuted by propagation, best branch first
+        if formula is not self.formula and not self.init_trail(formula):
+            return []
+        position = len(self.trail)
+        learned = len(self.learned)
+        children = []
+        if all(self.propagate(literal) for literal in cube):
+            branches = self.look_ahead(self.select_candidate_literals()) if self.open_clauses else []
+            if branches == []:
+                children.append(self.trail[:])
+            for literal in branches or []:
+                branch = len(self.trail)
+                if self.propagate(literal):
+                    children.append(self.trail[:])
+                self.undo(branch)
+        self.undo(position)
+        self.forget(learned)
+        return children
+
+    def look_ahead_cubes(self, depth=0):
+        # Cube tree below the current trail. Every cube is yielded as soon as it is made, so
+        # the conquer phase can start on it while the rest of the tree is still built.
+        # A branch that propagation alone satisfies is yielded too, its cube is a model.
+        if self.open_clauses and not self.is_formula_easy():
+            self.depth = depth
+            learned = len(self.learned)
+            fixed = len(self.trail)
+            branches = self.look_ahead(self.select_candidate_literals())
+            if branches and len(self.trail) > fixed and self.is_formula_easy():
+                branches = []       # the fixings made the node a leaf
+            for literal in branches or []:
+                position = len(self.trail)
+                if self.propagate(literal):
+                    yield from self.look_ahead_cubes(depth + 1)
+                self.undo(position)
+            self.forget(learned)
+            if branches != []:
+                return
+        if self.open_clauses == 0:
+            self.num_cubes += 1
+            self.satisfied = True
+        cube = self.trail[:]
+        self.cubes.append(cube)
+        yield cube
+
+    def generate_cubes(self, file_path):
+        self.read_dimacs_cnf(file_path)
+        if not self.init_trail(self.clauses):
+            return
+        if not self.probe_workers:
+            yield from self.look_ahead_cubes()
+            return
+        with Pool(self.probe_workers, _init_prober, (self.clauses,)) as self.pool:
+            try:
+                yield from self.look_ahead_cubes()
+            finally:
+                self.pool = None
 
     def solve(self, file_path):
         # start = time.time()
         # self.read_dimacs_cnf(file_path)
         # end = time.time()
         # print(f"Time taken to read Dimacs CNF: {end - start}")
-        self.read_dimacs_cnf(file_path)
-        sat, model = self.look_ahead_dpll(self.clauses)
+        for cube in self.generate_cubes(file_path):
+            if self.satisfied:
+                break       # this cube is a model, the rest of the tree is not needed
         print(f"Number of cubes learnt: {self.num_cubes}")
-        print(self.cubes)
-        print(self.clauses)
         return self.clauses, self.cubes
     
 def main():
@@ -1,4 +1,5 @@
 import time
+from cnf_cache import load_cached
 
 class DPLLSolver:
     def __init__(self):
@@ -8,17 +9,7 @@ class DPLLSolver:
         self.branch_count = 0
 
     def read_dimacs_cnf(self, input_file_path):
-        with open(input_file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(input_file_path)
     
     def find_unit_clause(self, formula):
         for clause in formula:
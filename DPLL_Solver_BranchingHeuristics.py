@@ -1,6 +1,7 @@
 import time
 import random
 from collections import defaultdict
+from cnf_cache import load_cached
 
 class DPLLSolver:
     def __init__(self):
@@ -11,17 +12,7 @@ class DPLLSolver:
         self.method = "static"
 
     def read_dimacs_cnf(self, input_file_path):
-        with open(input_file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(input_file_path)
 
     def find_unit_clause(self, formula):
         for clause in formula:
@@ -4,6 +4,7 @@ from collections import defaultdict
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import multiprocessing
+from cnf_cache import load_cached
 
 class Look_ahead_Solver:
     def __init__(self):
@@ -15,17 +16,7 @@ class Look_ahead_Solver:
         self.executor = ThreadPoolExecutor()
     
     def read_dimacs_cnf(self, file_path):
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(file_path)
     
     @staticmethod
     def find_unit_clause(formula):
@@ -1,26 +1,30 @@
+import heapq
 import time 
 from collections import defaultdict
+from cnf_cache import load_cached
+
+try:
+    import numpy
+except ImportError:     # only needed for the batched scores of vectorized=True
+    numpy = None
+
+# Scores are computed from clause length histograms: lengths[k] is the number of clauses of
+# length k in a formula. The histogram of a node is counted once and unit_propagate() keeps
+# a copy of it up to date as clauses get satisfied or shortened during a probe, so a score
+# costs the length of the histogram instead of two passes over the formula.
 
 class Look_ahead_Solver:
-    def __init__(self):
+    # vectorized: score all the probes of a node at once with NumPy (if it is installed)
+    def __init__(self, vectorized=False):
         self.clauses = []
         self.num_vars = 0
         self.num_clauses = 0
         self.branch_count = 0
         self.weights = [0,0,0]
+        self.vectorized = vectorized and numpy is not None
     
     def read_dimacs_cnf(self, file_path):
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(file_path)
     
     def find_unit_clause(self, formula):
         for clause in formula:
@@ -28,16 +32,23 @@ class Look_ahead_Solver:
                 return clause[0]
         return 0
                         
-    def unit_propagate(self, formula, model):
+    def unit_propagate(self, formula, model, lengths=None):
+        # lengths: clause length histogram of formula, updated to that of the result
         unit_clause = self.find_unit_clause(formula)
         while unit_clause != 0:
             new_unit_clause = 0
             new_formula = []
             for clause in formula:
                 if unit_clause in clause:
+                    if lengths is not None:
+                        lengths[len(clause)] -= 1
                     continue
                 elif -unit_clause in clause:
+                    if lengths is not None:
+                        lengths[len(clause)] -= 1
                     clause = [lit for lit in clause if lit != -unit_clause]
+                    if lengths is not None:
+                        lengths[len(clause)] += 1
                 if clause == []:
                     return [[]], []
                 if len(clause) == 1:
@@ -69,13 +80,17 @@ class Look_ahead_Solver:
             for literal in clause:
                 jw_scores[literal] += 2**-len(clause)
                 
-        # Sort the literals based on their Jeroslow-Wang scores in descending order
-        sorted_literals = sorted(jw_scores, key=jw_scores.get, reverse=True)
-        
-        # Return the top 5 literals
-        return sorted_literals[:5]
+        # Return the top 5 literals by their Jeroslow-Wang scores, picked with a heap
+        return heapq.nlargest(5, jw_scores, key=jw_scores.get)
+
+    @staticmethod
+    def length_histogram(formula):
+        lengths = [0] * (max(max(map(len, formula), default=0), 1) + 1)
+        for clause in formula:
+            lengths[len(clause)] += 1
+        return lengths
 
-    def compute_score(self, original_formula, new_formula, original_model, new_model):
+    def compute_score(self, original_lengths, new_lengths, original_model, new_model):
         # # Reduction in the number of clauses, prioritizing larger reductions.
         # clause_reduction = len(original_formula) - len(new_formula)
 
@@ -91,12 +106,12 @@ class Look_ahead_Solver:
         # score = (clause_reduction * self.weights[0]) + (model_increase * self.weights[1]) + (complexity_reduction*self.weights[2])
         
                 # Original components
-        clause_reduction = len(original_formula) - len(new_formula)
+        clause_reduction = sum(original_lengths) - sum(new_lengths)
         model_increase = len(new_model) - len(original_model)
 
         # New JW-like scoring for clause complexity reduction
-        jw_score_original = sum(2**-len(clause) for clause in original_formula)
-        jw_score_new = sum(2**-len(clause) for clause in new_formula)
+        jw_score_original = sum(count * 2**-length for length, count in enumerate(original_lengths))
+        jw_score_new = sum(count * 2**-length for length, count in enumerate(new_lengths))
         jw_complexity_reduction = jw_score_original - jw_score_new
 
         # Combine scores with adjusted weights
@@ -106,33 +121,109 @@ class Look_ahead_Solver:
 
         return score
 
+    def compute_scores(self, original_lengths, new_lengths, original_model, new_models):
+        # compute_score() of every probe at once; the histograms are padded to one length
+        width = max(len(original_lengths), max(map(len, new_lengths)))
+        histograms = numpy.zeros((len(new_lengths), width))
+        for row, lengths in enumerate(new_lengths):
+            histograms[row, :len(lengths)] = lengths
+        original = numpy.zeros(width)
+        original[:len(original_lengths)] = original_lengths
+        jw_weights = 2.0 ** -numpy.arange(width)
+        clause_reduction = original.sum() - histograms.sum(axis=1)
+        model_increase = numpy.array([len(new_model) for new_model in new_models]) - len(original_model)
+        jw_complexity_reduction = original @ jw_weights - histograms @ jw_weights
+        return (clause_reduction * self.weights[0]) + (model_increase * self.weights[1]) + (jw_complexity_reduction * self.weights[2])
+
+    def add_clauses(self, formula, model, clauses):
+        # formula plus the clauses, simplified under model and unit propagated
+        assigned = set(model)
+        added = [[literal for literal in clause if -literal not in assigned]
+                 for clause in clauses if not any(literal in assigned for literal in clause)]
+        if [] in added:
+            return [[]], []
+        return self.unit_propagate(formula + added, model[:])
+
     def look_ahead(self, formula, literals, model):
-        best_score = 0
-        best_output = []
-        for literal in literals:
-            model_pos = model[:]
-            model_neg = model[:]
-            formula_pos, model_pos = self.unit_propagate(formula+[[literal]], model_pos)
-            formula_neg, model_neg = self.unit_propagate(formula+[[-literal]], model_neg)
-            if formula_pos == [[]] and formula_neg == [[]]:
+        # Probe both signs of every candidate and return the formulas and models of the best
+        # branch and of the other one. What the probes find is kept at the node: a failed
+        # literal is fixed to its other sign, a literal implied by both signs of a candidate
+        # is fixed, and a probe of literal that implies another candidate's literal x learns
+        # the binary clause (-literal or x), added to the formula at the next fixing and to
+        # both branches. After a fixing the candidates are probed again on the new formula,
+        # replacing those that got assigned. A refuted node returns [[]] for both branches.
+        learned = {}
+        while True:
+            assigned = set(model)
+            candidates = [literal for literal in literals if literal not in assigned and -literal not in assigned]
+            if not candidates:
+                candidates = literals = self.select_candidate_literals(formula)
+            variables = {abs(literal) for literal in candidates}
+            new_learned = []
+            best_score = 0
+            best_output = []
+            lengths = self.length_histogram(formula)
+            probes = []
+            fixed = None
+            for literal in candidates:
+                model_pos = model[:]
+                model_neg = model[:]
+                lengths_pos = lengths[:]
+                lengths_neg = lengths[:]
+                lengths_pos[1] += 1     # the unit clause of the probe
+                lengths_neg[1] += 1
+                formula_pos, model_pos = self.unit_propagate(formula+[[literal]], model_pos, lengths_pos)
+                formula_neg, model_neg = self.unit_propagate(formula+[[-literal]], model_neg, lengths_neg)
+                if formula_pos == [[]] and formula_neg == [[]]:
+                    return [[]], [], [[]], []
+                elif formula_pos == [[]]:
+                    fixed = [-literal]
+                    break
+                elif formula_neg == [[]]:
+                    fixed = [literal]
+                    break
+                elif formula_pos == []:
+                    return formula_pos, model_pos, formula_neg, model_neg
+                elif formula_neg == []:
+                    return formula_neg, model_neg, formula_pos, model_pos
+                necessary = set(model_pos).intersection(model_neg).difference(assigned)
+                if necessary:
+                    fixed = list(necessary)
+                    break
+                for probed, implied_literals in ((literal, model_pos), (-literal, model_neg)):
+                    for implied in implied_literals:
+                        if abs(implied) in variables and implied != probed:
+                            clause = (-probed, implied)
+                            if clause not in learned:
+                                learned[clause] = True
+                                new_learned.append(list(clause))
+                if self.vectorized:
+                    probes.append((lengths_pos, [formula_pos, model_pos, formula_neg, model_neg]))
+                    probes.append((lengths_neg, [formula_neg, model_neg, formula_pos, model_pos]))
+                else:
+                    score_pos = self.compute_score(lengths, lengths_pos, model, model_pos)
+                    score_neg = self.compute_score(lengths, lengths_neg, model, model_neg)
+                    if score_pos > best_score:
+                        best_score = score_pos
+                        best_output = [formula_pos, model_pos, formula_neg, model_neg]
+                    if score_neg > best_score:
+                        best_score = score_neg
+                        best_output = [formula_neg, model_neg, formula_pos, model_pos]
+            if fixed is None:
+                break
+            formula, model = self.add_clauses(formula, model, new_learned + [[implied] for implied in fixed])
+            if formula == [[]]:
                 return [[]], [], [[]], []
-            elif formula_pos == [[]]:
-                return [[]], [], formula_neg, model_neg
-            elif formula_neg == [[]]:
-                return formula_pos, model_pos, [[]], []
-            elif formula_pos == []:
-                return formula_pos, model_pos, formula_neg, model_neg
-            elif formula_neg == []:
-                return formula_neg, model_neg, formula_pos, model_pos
-            else:
-                score_pos = self.compute_score(formula, formula_pos, model, model_pos)
-                score_neg = self.compute_score(formula, formula_neg, model, model_neg)
-                if score_pos > best_score:
-                    best_score = score_pos
-                    best_output = [formula_pos, model_pos, formula_neg, model_neg] 
-                if score_neg > best_score:
-                    best_score = score_neg
-                    best_output = [formula_neg, model_neg, formula_pos, model_pos]
+            if formula == []:
+                return formula, model, [[]], []
+        if probes:
+            scores = self.compute_scores(lengths, [probe[0] for probe in probes], model, [probe[1][1] for probe in probes])
+            best = int(scores.argmax())
+            if scores[best] > best_score:
+                best_output = probes[best][1]
+        if new_learned:
+            best_output[0:2] = self.add_clauses(best_output[0], best_output[1], new_learned)
+            best_output[2:4] = self.add_clauses(best_output[2], best_output[3], new_learned)
         return best_output[0], best_output[1], best_output[2], best_output[3]
 
     def look_ahead_dpll(self, formula, model = []):
@@ -0,0 +1,74 @@
+import glob
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from bench_cnf_loader import generate_random_cnf
+from CDCL_Solver import CDCLSolver
+
+# Propagation throughput of CDCLSolver on the uf100-430 set and on generated uf250-like
+# random 3-SAT instances (250 variables, 1065 clauses, the SATLIB ratio). Each solve is cut
+# off after TIME_LIMIT seconds; the propagations done until then still count.
+# Usage: python bench_cdcl.py [number_of_uf100_files] [number_of_uf250_instances] [file.cnf ...]
+# Extra files (e.g. large industrial instances) are reported one per line.
+
+TIME_LIMIT = 30
+
+
+def _timeout(signum, frame):
+    raise TimeoutError
+
+
+def run(paths, **solve_options):
+    propagations = 0
+    conflicts = 0
+    minimized = 0
+    elapsed = 0.0
+    timeouts = 0
+    signal.signal(signal.SIGALRM, _timeout)
+    for path in paths:
+        solver = CDCLSolver()
+        start = time.time()
+        signal.alarm(TIME_LIMIT)
+        try:
+            solver.solve(path, **solve_options)
+        except TimeoutError:
+            timeouts += 1
+        finally:
+            signal.alarm(0)
+        elapsed += time.time() - start
+        propagations += solver.propagations
+        conflicts += solver.learned_count
+        minimized += solver.minimized_count
+    return propagations, conflicts, minimized, elapsed, timeouts
+
+
+def report(label, paths, **solve_options):
+    if not paths:
+        return
+    propagations, conflicts, minimized, elapsed, timeouts = run(paths, **solve_options)
+    print(f"{label:<24}{len(paths):>8}{timeouts:>10}{conflicts:>11}{propagations:>14}{elapsed:>10.2f}"
+          f"{propagations / elapsed:>14.0f}{elapsed * 1e6 / max(conflicts, 1):>14.0f}{minimized / max(conflicts, 1):>14.2f}")
+
+
+def main():
+    uf100_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    uf250_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{'set':<24}{'files':>8}{'timeouts':>10}{'conflicts':>11}{'propagations':>14}{'seconds':>10}"
+          f"{'props/s':>14}{'us/conflict':>14}{'removed/confl':>14}")
+    report('uf100-430', sorted(glob.glob('./tests/uf100-430/*.cnf'))[:uf100_count])
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(uf250_count):
+            path = os.path.join(tmp, f'uf250-{seed}.cnf')
+            generate_random_cnf(path, 250, 1065, seed=seed)
+            paths.append(path)
+        report('uf250-1065 (random)', paths)
+    for path in sys.argv[3:]:
+        report(os.path.basename(path), [path])
+
+
+if __name__ == "__main__":
+    main()
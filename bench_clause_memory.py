@@ -0,0 +1,54 @@
+import glob
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from bench_cnf_loader import generate_random_cnf
+from clause_arena import ClauseArena
+from cnf_loader import load_dimacs
+
+# Memory held by the clause database: list of lists (old CDCLSolver.clauses) versus ClauseArena.
+# Usage: python bench_clause_memory.py [folder_with_cnf_files] [num_vars num_clauses]
+
+
+def list_footprint(clauses):
+    # Rebuild the lists under tracemalloc so the count covers list objects and boxed ints
+    tracemalloc.start()
+    copy = [[int(str(literal)) for literal in clause] for clause in clauses]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy
+    return size
+
+
+def arena_footprint(clauses):
+    tracemalloc.start()
+    arena = ClauseArena.from_clauses(clauses)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del arena
+    return size
+
+
+def report(label, clauses_list):
+    literal_count = sum(len(clause) for clauses in clauses_list for clause in clauses)
+    lists = sum(list_footprint(clauses) for clauses in clauses_list)
+    arena = sum(arena_footprint(clauses) for clauses in clauses_list)
+    print(f"{label:<28}{literal_count:>12}{lists / (1 << 20):>14.2f}{arena / (1 << 20):>14.2f}{lists / arena:>10.1f}x")
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else './tests/uf100-430'
+    num_vars, num_clauses = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (1000000, 4200000)
+    print(f"{'instance':<28}{'literals':>12}{'lists (MB)':>14}{'arena (MB)':>14}{'ratio':>11}")
+    files = sorted(glob.glob(os.path.join(folder, '*.cnf')))
+    report(f"{os.path.basename(folder)} ({len(files)} files)", [load_dimacs(path)[2] for path in files])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'random.cnf')
+        generate_random_cnf(path, num_vars, num_clauses)
+        report(f"random {num_vars}/{num_clauses}", [load_dimacs(path)[2]])
+
+
+if __name__ == "__main__":
+    main()
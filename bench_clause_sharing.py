@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+
+from bench_cnf_loader import generate_random_cnf
+from portfolio import solve_portfolio
+
+# Wall time of the portfolio on generated random 3-SAT instances past the threshold (mostly
+# UNSAT), by number of workers, without and with learned clause sharing. Speedup is against
+# a single worker without sharing.
+# Usage: python bench_clause_sharing.py [number_of_variables] [number_of_instances] [workers ...]
+
+TIME_LIMIT = 300
+
+
+def run(paths, workers, share):
+    elapsed = 0.0
+    unknown = 0
+    imported = 0
+    for path in paths:
+        answer = solve_portfolio(path, workers, time_limit=TIME_LIMIT, share=share)
+        elapsed += answer['time']
+        if answer['winner'] is None:
+            unknown += 1
+        else:
+            imported += answer['stats'].get('imported', 0)
+    return elapsed, unknown, imported
+
+
+def main():
+    num_vars = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    worker_counts = [int(argument) for argument in sys.argv[3:]] or [1, 2, 4, os.cpu_count() or 1]
+    worker_counts = sorted(set(worker_counts))
+    print(f"{count} random 3-SAT instances, {num_vars} variables, {int(num_vars * 4.6)} clauses, {os.cpu_count()} cores")
+    print(f"{'workers':>8}{'sharing':>9}{'seconds':>10}{'speedup':>10}{'unknown':>10}{'imported':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(count):
+            path = os.path.join(tmp, f'random-{seed}.cnf')
+            generate_random_cnf(path, num_vars, int(num_vars * 4.6), seed=seed)
+            paths.append(path)
+        baseline = None
+        for workers in worker_counts:
+            for share in (False, True):
+                if workers == 1 and share:
+                    continue
+                elapsed, unknown, imported = run(paths, workers, share)
+                if baseline is None:
+                    baseline = elapsed
+                print(f"{workers:>8}{'yes' if share else 'no':>9}{elapsed:>10.2f}{baseline / elapsed:>10.2f}"
+                      f"{unknown:>10}{imported:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+from cnf_cache import cache_path, load_cached, open_cnf_buffer
+from cnf_loader import load_dimacs
+
+# Compares the shared chunked loader against the per-line parser every engine used to carry,
+# and the binary cache: 'cache cold' parses and writes <file>.cnfc, 'cache warm' loads the
+# lists from the mapped cache and 'mmap view' only maps it (what the arena based code uses).
+# Usage: python bench_cnf_loader.py [file.cnf ...]
+# Without arguments a random 3-SAT instance of roughly 100 MB is generated in a temp dir.
+
+
+def legacy_read_dimacs_cnf(file_path):
+    clauses = []
+    num_vars = num_clauses = 0
+    with open(file_path, 'r') as file:
+        for line in file:
+            if line.startswith('c') or line.startswith('0') or line.startswith('%'):
+                continue
+            elif line.startswith('p'):
+                _, _, num_vars, num_clauses = line.split()
+                num_vars, num_clauses = int(num_vars), int(num_clauses)
+            else:
+                clause = [int(x) for x in line.split() if x != '0']
+                if clause:
+                    clauses.append(clause)
+    return num_vars, num_clauses, clauses
+
+
+def generate_random_cnf(file_path, num_vars, num_clauses, k=3, seed=0):
+    rng = random.Random(seed)
+    with open(file_path, 'w') as file:
+        file.write(f"c random {k}-SAT instance\n")
+        file.write(f"p cnf {num_vars} {num_clauses}\n")
+        lines = []
+        for _ in range(num_clauses):
+            variables = rng.sample(range(1, num_vars + 1), k)
+            lines.append(' '.join(str(v if rng.random() < 0.5 else -v) for v in variables) + ' 0\n')
+            if len(lines) == 100000:
+                file.writelines(lines)
+                lines = []
+        file.writelines(lines)
+
+
+def measure(parser, file_path):
+    size = os.path.getsize(file_path) / (1 << 20)
+    start = time.time()
+    _, _, clauses = parser(file_path)
+    elapsed = time.time() - start
+    return len(clauses), elapsed, size / elapsed
+
+
+def main(paths):
+    with tempfile.TemporaryDirectory() as tmp:
+        if not paths:
+            path = os.path.join(tmp, 'random.cnf')
+            generate_random_cnf(path, 1000000, 4200000)
+            paths = [path]
+        print(f"{'file':<40}{'parser':<12}{'clauses':>10}{'seconds':>10}{'MB/s':>10}")
+        for path in paths:
+            name = os.path.basename(path)
+            if os.path.exists(cache_path(path)):
+                os.remove(cache_path(path))
+            for label, parser in (('legacy', legacy_read_dimacs_cnf), ('chunked', load_dimacs),
+                                  ('cache cold', load_cached), ('cache warm', load_cached)):
+                count, elapsed, rate = measure(parser, path)
+                print(f"{name:<40}{label:<12}{count:>10}{elapsed:>10.2f}{rate:>10.1f}")
+            start = time.time()
+            buffer = open_cnf_buffer(path)
+            elapsed = time.time() - start
+            rate = os.path.getsize(path) / (1 << 20) / elapsed
+            print(f"{name:<40}{'mmap view':<12}{len(buffer):>10}{elapsed:>10.4f}{rate:>10.1f}")
+            buffer.close()
+            if not path.endswith('.gz'):
+                # Compressed input goes through the same loader; MB/s is of the uncompressed size
+                packed = os.path.join(tmp, name + '.gz')
+                with open(path, 'rb') as src, gzip.open(packed, 'wb', compresslevel=1) as dst:
+                    dst.write(src.read())
+                start = time.time()
+                _, _, clauses = load_dimacs(packed)
+                elapsed = time.time() - start
+                rate = os.path.getsize(path) / (1 << 20) / elapsed
+                print(f"{name + '.gz':<40}{'chunked':<12}{len(clauses):>10}{elapsed:>10.2f}{rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from bench_cnf_loader import generate_random_cnf
+from Cubing_draft1 import Look_ahead_Solver
+
+# Time to build the cube tree of Look_ahead_Solver (its first max_cubes cubes, 0 for all) on
+# generated random 3-SAT instances at the threshold, probing in process and on pools of
+# probe workers.
+# Usage: python bench_cubing.py [number_of_variables] [number_of_instances] [max_cubes] [probe_workers ...]
+
+
+def run(paths, probe_workers, max_cubes):
+    elapsed = 0.0
+    cubes = 0
+    for path in paths:
+        solver = Look_ahead_Solver(probe_workers)
+        start = time.time()
+        cubes += sum(1 for _ in islice(solver.generate_cubes(path), max_cubes or None))
+        elapsed += time.time() - start
+    return elapsed, cubes
+
+
+def main():
+    num_vars = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    max_cubes = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    worker_counts = [int(argument) for argument in sys.argv[4:]] or [2, os.cpu_count() or 1]
+    print(f"{count} random 3-SAT instances, {num_vars} variables, {int(num_vars * 4.26)} clauses, {os.cpu_count()} cores")
+    print(f"{'probe workers':<16}{'cubes':>8}{'seconds':>10}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(count):
+            path = os.path.join(tmp, f'random-{seed}.cnf')
+            generate_random_cnf(path, num_vars, int(num_vars * 4.26), seed=seed)
+            paths.append(path)
+        baseline, cubes = run(paths, None, max_cubes)
+        print(f"{'none':<16}{cubes:>8}{baseline:>10.2f}{1:>10.2f}")
+        for workers in worker_counts:
+            elapsed, cubes = run(paths, workers, max_cubes)
+            print(f"{workers:<16}{cubes:>8}{elapsed:>10.2f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
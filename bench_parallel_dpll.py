@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+
+from bench_cnf_loader import generate_random_cnf
+from parallel_dpll import DPLLSolver
+
+# Wall time of parallel_dpll on generated random 3-SAT instances at the threshold, by number
+# of workers, in process mode and in the old thread mode. Speedup is against one process.
+# Usage: python bench_parallel_dpll.py [number_of_variables] [number_of_instances] [workers ...]
+
+
+def run(paths, mode, workers):
+    elapsed = 0.0
+    cubes = 0
+    satisfiable = 0
+    for path in paths:
+        solver = DPLLSolver(path, mode=mode, workers=workers)
+        start = time.time()
+        sat, _ = solver.solve()
+        elapsed += time.time() - start
+        cubes += len(solver.cubes)
+        satisfiable += sat
+    return elapsed, cubes, satisfiable
+
+
+def main():
+    num_vars = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    worker_counts = sorted(set(int(argument) for argument in sys.argv[3:])) or [1, 2, 4, os.cpu_count() or 1]
+    print(f"{count} random 3-SAT instances, {num_vars} variables, {int(num_vars * 4.26)} clauses, {os.cpu_count()} cores")
+    print(f"{'mode':<10}{'workers':>8}{'cubes':>8}{'sat':>6}{'seconds':>10}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(count):
+            path = os.path.join(tmp, f'random-{seed}.cnf')
+            generate_random_cnf(path, num_vars, int(num_vars * 4.26), seed=seed)
+            paths.append(path)
+        baseline = None
+        for mode in ('process', 'thread'):
+            for workers in sorted(set(worker_counts)):
+                elapsed, cubes, satisfiable = run(paths, mode, workers)
+                if baseline is None:
+                    baseline = elapsed
+                print(f"{mode:<10}{workers:>8}{cubes:>8}{satisfiable:>6}{elapsed:>10.2f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
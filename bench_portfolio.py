@@ -0,0 +1,59 @@
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench_cnf_loader import generate_random_cnf
+from CDCL_Solver import CDCLSolver
+from portfolio import portfolio_configurations, solve_portfolio
+
+# Races the portfolio on the uf100-430 set and on generated uf250-like instances and counts
+# which configuration won, next to the wall time of the default configuration alone.
+# Usage: python bench_portfolio.py [number_of_workers] [number_of_uf100_files] [number_of_uf250_instances]
+
+TIME_LIMIT = 60
+
+
+def bench(label, paths, workers):
+    if not paths:
+        return
+    single = 0.0
+    for path in paths:
+        start = time.time()
+        CDCLSolver().solve(path)
+        single += time.time() - start
+    wins = Counter()
+    racing = 0.0
+    unknown = 0
+    for path in paths:
+        answer = solve_portfolio(path, workers, time_limit=TIME_LIMIT)
+        racing += answer['time']
+        if answer['winner'] is None:
+            unknown += 1
+        else:
+            wins[answer['winner']] += 1
+    print(f"{label:<24}{len(paths):>8}{single:>12.2f}{racing:>12.2f}{single / racing:>10.2f}{unknown:>10}")
+    for index, configuration in enumerate(portfolio_configurations(workers)):
+        print(f"{'':<4}worker {index:<3}{wins[index]:>6} wins  {configuration}")
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    uf100_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    uf250_count = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    print(f"{workers} workers on {os.cpu_count()} cores")
+    print(f"{'set':<24}{'files':>8}{'single s':>12}{'racing s':>12}{'speedup':>10}{'unknown':>10}")
+    bench('uf100-430', sorted(glob.glob('./tests/uf100-430/*.cnf'))[:uf100_count], workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for seed in range(uf250_count):
+            path = os.path.join(tmp, f'uf250-{seed}.cnf')
+            generate_random_cnf(path, 250, 1065, seed=seed)
+            paths.append(path)
+        bench('uf250-1065 (random)', paths, workers)
+
+
+if __name__ == "__main__":
+    main()
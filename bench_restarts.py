@@ -0,0 +1,35 @@
+import glob
+import os
+import sys
+import tempfile
+
+from bench_cdcl import report
+from bench_cnf_loader import generate_random_cnf
+from restart import RESTART_POLICIES
+
+# Compares the CDCLSolver restart policies on the uf100-430 set and on generated uf250-like
+# instances; the columns are the ones of bench_cdcl.py.
+# Usage: python bench_restarts.py [number_of_uf100_files] [number_of_uf250_instances] [policy ...]
+
+
+def main():
+    uf100_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    uf250_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    policies = sys.argv[3:] or list(RESTART_POLICIES)
+    uf100 = sorted(glob.glob('./tests/uf100-430/*.cnf'))[:uf100_count]
+    print(f"{'set / policy':<24}{'files':>8}{'timeouts':>10}{'conflicts':>11}{'propagations':>14}{'seconds':>10}"
+          f"{'props/s':>14}{'us/conflict':>14}{'removed/confl':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        uf250 = []
+        for seed in range(uf250_count):
+            path = os.path.join(tmp, f'uf250-{seed}.cnf')
+            generate_random_cnf(path, 250, 1065, seed=seed)
+            uf250.append(path)
+        for policy in policies:
+            report(f"uf100 {policy}", uf100, restart_policy=policy)
+        for policy in policies:
+            report(f"uf250 {policy}", uf250, restart_policy=policy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from array import array
+from itertools import accumulate, chain
+
+# Clause flags
+LEARNED = 1
+DELETED = 2
+USED = 4        # learned clause took part in conflict analysis since the last reduction
+
+
+class ClauseArena:
+    # All clause literals live in one contiguous int32 buffer. A clause is addressed by
+    # its index and described by an offset into that buffer, a size and a flag byte, so
+    # the database costs a few bytes per literal instead of a list object per clause.
+    # positions holds, per clause, where the last replacement watch was found so the next
+    # search resumes there instead of rescanning the literals right after the watches.
+    # lbd and activity score learned clauses for the clause database reduction.
+    def __init__(self):
+        self.literals = array('i')
+        self.offsets = array('q')
+        self.sizes = array('i')
+        self.flags = array('B')
+        self.positions = array('i')
+        self.lbd = array('B')
+        self.activity = array('f')
+
+    @classmethod
+    def from_clauses(cls, clauses, flags=0):
+        arena = cls()
+        arena.extend(clauses, flags)
+        return arena
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __iter__(self):
+        # Yields the live clauses as lists
+        for index in range(len(self.sizes)):
+            if not self.flags[index] & DELETED:
+                yield self.clause(index)
+
+    def extend(self, clauses, flags=0):
+        # Bulk append, the per-clause bookkeeping is built by C-level iterators
+        sizes = array('i', map(len, clauses))
+        start = len(self.literals)
+        self.offsets.extend(accumulate(chain((start,), sizes[:-1])) if sizes else ())
+        self.sizes.extend(sizes)
+        self.flags.extend(bytes([flags]) * len(sizes))
+        self.positions.extend(array('i', [2]) * len(sizes))
+        self.lbd.extend(bytes(len(sizes)))
+        self.activity.extend(array('f', bytes(4 * len(sizes))))
+        self.literals.extend(chain.from_iterable(clauses))
+
+    def add_clause(self, clause, flags=0, lbd=0):
+        # Append one clause and return its index
+        self.offsets.append(len(self.literals))
+        self.sizes.append(len(clause))
+        self.flags.append(flags)
+        self.positions.append(2)
+        self.lbd.append(min(lbd, 255))
+        self.activity.append(0.0)
+        self.literals.extend(clause)
+        return len(self.sizes) - 1
+
+    def clause(self, index):
+        start = self.offsets[index]
+        return self.literals[start:start + self.sizes[index]].tolist()
+
+    def delete(self, index):
+        self.flags[index] |= DELETED
+
+    def compact(self):
+        # Drop deleted clauses and close the gaps in every buffer. Returns an array mapping
+        # old clause indices to new ones (-1 for deleted clauses), so callers can rewrite
+        # the indices they hold. Clauses before the first deleted one keep their place.
+        count = len(self.sizes)
+        mapping = array('i', range(count))
+        flags = self.flags
+        first = 0
+        while first < count and not flags[first] & DELETED:
+            first += 1
+        if first == count:
+            return mapping
+        literals = self.literals
+        kept = [index for index in range(first, count) if not flags[index] & DELETED]
+        end = self.offsets[first]
+        new_literals = literals[:end]
+        new_offsets = self.offsets[:first]
+        for index in kept:
+            start = self.offsets[index]
+            new_offsets.append(len(new_literals))
+            new_literals.extend(literals[start:start + self.sizes[index]])
+        for index in range(first, count):
+            mapping[index] = -1
+        for position, index in enumerate(kept, first):
+            mapping[index] = position
+        self.literals = new_literals
+        self.offsets = new_offsets
+        for name in ('sizes', 'flags', 'positions', 'lbd', 'activity'):
+            buffer = getattr(self, name)
+            setattr(self, name, buffer[:first] + array(buffer.typecode, map(buffer.__getitem__, kept)))
+        return mapping
+
+    def memory_usage(self):
+        # Bytes held by the buffers
+        return sum(len(buffer) * buffer.itemsize
+                   for buffer in (self.literals, self.offsets, self.sizes, self.flags, self.positions,
+                                  self.lbd, self.activity))
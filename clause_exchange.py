@@ -0,0 +1,141 @@
+from array import array
+from multiprocessing import shared_memory
+
+# Learned clause sharing between solver processes. Every worker owns one ring buffer in
+# shared memory and is its only writer; the others read it, so no locks are needed.
+# A ring is an int64 count of clauses ever written followed by capacity fixed-size slots
+# of int32 [lbd, size, literal, ...]. The writer fills slot count % capacity and then
+# publishes it by incrementing count. A reader remembers the count it read up to; slots it
+# was lapped on are lost, and slots the writer may have been overwriting while they were
+# copied are dropped after re-reading count. While clause count is being written the slot
+# of clause count - capacity is already being overwritten, so only the clauses after it
+# are safe to read.
+
+HEADER = 8
+
+
+class ClauseRing:
+    def __init__(self, memory, capacity, max_size):
+        self.memory = memory
+        self.capacity = capacity
+        self.slot = max_size + 2
+        self.count = memory.buf[:HEADER].cast('q')
+        self.slots = memory.buf[HEADER:HEADER + 4 * capacity * self.slot].cast('i')
+
+    @classmethod
+    def create(cls, capacity=4096, max_size=8):
+        memory = shared_memory.SharedMemory(create=True, size=HEADER + 4 * capacity * (max_size + 2))
+        ring = cls(memory, capacity, max_size)
+        ring.count[0] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity=4096, max_size=8):
+        return cls(shared_memory.SharedMemory(name=name), capacity, max_size)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, clause, lbd):
+        start = (self.count[0] % self.capacity) * self.slot
+        self.slots[start] = lbd
+        self.slots[start + 1] = len(clause)
+        self.slots[start + 2:start + 2 + len(clause)] = array('i', clause)
+        self.count[0] += 1
+
+    def read(self, position):
+        # Clauses written since position as (clause, lbd), the new position and the number lost
+        end = self.count[0]
+        lost = max(0, end - self.capacity + 1 - position)
+        position += lost
+        clauses = []
+        for number in range(position, end):
+            start = (number % self.capacity) * self.slot
+            size = self.slots[start + 1]
+            clauses.append((self.slots[start + 2:start + 2 + size].tolist(), self.slots[start]))
+        overwritten = max(0, self.count[0] - self.capacity + 1 - position)
+        if overwritten:
+            clauses = clauses[overwritten:]
+            lost += overwritten
+        return clauses, end, lost
+
+    def close(self):
+        self.count.release()
+        self.slots.release()
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+def create_rings(workers, capacity=4096, max_size=8):
+    # One ring per worker, made by the parent process; the workers attach by ring.name
+    # and the parent unlinks them when the workers are done
+    return [ClauseRing.create(capacity, max_size) for _ in range(workers)]
+
+
+class ClauseExchange:
+    # One worker's end of the exchange: export() offers a learned clause, import_clauses()
+    # returns the new clauses of the other workers. Units and clauses with an LBD up to
+    # max_lbd or at most short_size literals are shared, never more than max_size literals.
+    # Exports are rate limited by a token bucket that gains export_rate tokens per offered
+    # clause and holds at most export_burst; units do not need a token. A clause is exported
+    # or imported once: clauses are deduplicated by the hash of their sorted literals.
+    def __init__(self, rings, index, max_lbd=3, short_size=2, max_size=8, export_rate=0.25, export_burst=64):
+        self.rings = rings
+        self.index = index
+        self.positions = [ring.count[0] for ring in rings]
+        self.max_lbd = max_lbd
+        self.short_size = short_size
+        self.max_size = max_size
+        self.export_rate = export_rate
+        self.export_burst = export_burst
+        self.tokens = export_burst
+        self.known = set()
+        self.stats = {'exported': 0, 'imported': 0, 'duplicates': 0, 'rate_limited': 0, 'lost': 0}
+
+    @classmethod
+    def attach(cls, names, index, capacity=4096, max_size=8, **options):
+        rings = [ClauseRing.attach(name, capacity, max_size) for name in names]
+        return cls(rings, index, max_size=max_size, **options)
+
+    def export(self, clause, lbd):
+        self.tokens = min(self.export_burst, self.tokens + self.export_rate)
+        if len(clause) > self.max_size:
+            return
+        if len(clause) > 1 and lbd > self.max_lbd and len(clause) > self.short_size:
+            return
+        key = hash(tuple(sorted(clause)))
+        if key in self.known:
+            self.stats['duplicates'] += 1
+            return
+        if len(clause) > 1:
+            if self.tokens < 1:
+                self.stats['rate_limited'] += 1
+                return
+            self.tokens -= 1
+        self.known.add(key)
+        self.rings[self.index].write(clause, lbd)
+        self.stats['exported'] += 1
+
+    def import_clauses(self):
+        imported = []
+        for index, ring in enumerate(self.rings):
+            if index == self.index:
+                continue
+            clauses, self.positions[index], lost = ring.read(self.positions[index])
+            self.stats['lost'] += lost
+            for clause, lbd in clauses:
+                key = hash(tuple(sorted(clause)))
+                if key in self.known:
+                    self.stats['duplicates'] += 1
+                    continue
+                self.known.add(key)
+                imported.append((clause, lbd))
+        self.stats['imported'] += len(imported)
+        return imported
+
+    def close(self):
+        for ring in self.rings:
+            ring.close()
@@ -0,0 +1,153 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate, chain
+
+from cnf_loader import load_dimacs, paused_gc
+
+# Binary CNF container written next to the source file (<file>.cnfc):
+#   header    magic, version, byte order, num_vars, num_clauses (from the p line),
+#             stored clause count, literal count, source size, source mtime, source hash
+#   offsets   int64[stored clauses + 1], clause i is literals[offsets[i]:offsets[i + 1]]
+#   literals  int32[literal count]
+# Later loads map the file and hand out memoryviews over it, so nothing is parsed or copied.
+
+CACHE_SUFFIX = '.cnfc'
+MAGIC = b'CNFCACHE'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqqqqqq16s')
+_BYTE_ORDER = 1 if sys.byteorder == 'little' else 2
+_HASH_BLOCK = 1 << 24
+
+
+class CNFBuffer:
+    def __init__(self, num_vars, num_clauses, offsets, literals, mapping=None):
+        self.num_vars = num_vars
+        self.num_clauses = num_clauses
+        self.offsets = offsets          # int64 memoryview/array, one entry more than clauses
+        self.literals = literals        # int32 memoryview/array
+        self.mapping = mapping          # mmap kept open while the views are in use
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def clauses(self):
+        # List of lists for the engines that rewrite their formula; slicing happens in C
+        literals = self.literals.tolist()
+        offsets = self.offsets.tolist()
+        with paused_gc():
+            return list(map(literals.__getitem__, map(slice, offsets[:-1], offsets[1:])))
+
+    def close(self):
+        if self.mapping is not None:
+            self.offsets.release()
+            self.literals.release()
+            self.mapping.close()
+            self.mapping = None
+
+
+def cache_path(file_path):
+    return file_path + CACHE_SUFFIX
+
+
+def file_hash(file_path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def write_cache(file_path, num_vars, num_clauses, clauses, source_hash=None):
+    # Written to a temporary file and renamed, so readers never map a half written cache
+    # and processes still mapping the previous version keep a valid file
+    stat = os.stat(file_path)
+    offsets = array('q', accumulate(chain((0,), map(len, clauses))))
+    literals = array('i', chain.from_iterable(clauses))
+    header = HEADER.pack(MAGIC, VERSION, _BYTE_ORDER, num_vars, num_clauses, len(clauses), len(literals),
+                         stat.st_size, stat.st_mtime_ns, source_hash or file_hash(file_path))
+    target = cache_path(file_path)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(header)
+            offsets.tofile(file)
+            literals.tofile(file)
+        os.replace(temporary, target)
+    except OSError:
+        # Read-only directory or full disk: the cache is only an optimisation
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return CNFBuffer(num_vars, num_clauses, offsets, literals)
+
+
+def _refresh_mtime(path, raw, mtime):
+    fields = list(HEADER.unpack(raw))
+    fields[8] = mtime
+    try:
+        with open(path, 'r+b') as file:
+            file.write(HEADER.pack(*fields))
+    except OSError:
+        pass
+
+
+def _map_cache(file_path):
+    # Returns a CNFBuffer over the cache file, or None when it is missing or stale
+    path = cache_path(file_path)
+    try:
+        stat = os.stat(file_path)
+        file = open(path, 'rb')
+    except OSError:
+        return None
+    with file:
+        raw = file.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            return None
+        (magic, version, byte_order, num_vars, num_clauses, clause_count, literal_count,
+         size, mtime, source_hash) = HEADER.unpack(raw)
+        if magic != MAGIC or version != VERSION or byte_order != _BYTE_ORDER:
+            return None
+        end = HEADER.size + 8 * (clause_count + 1) + 4 * literal_count
+        if os.fstat(file.fileno()).st_size != end or size != stat.st_size:
+            return None
+        if mtime != stat.st_mtime_ns:
+            # Touched or rewritten source of the same size: the content hash decides
+            if file_hash(file_path) != source_hash:
+                return None
+            _refresh_mtime(path, raw, stat.st_mtime_ns)
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    offsets = view[HEADER.size:HEADER.size + 8 * (clause_count + 1)].cast('q')
+    literals = view[HEADER.size + 8 * (clause_count + 1):end].cast('i')
+    view.release()
+    return CNFBuffer(num_vars, num_clauses, offsets, literals, mapping)
+
+
+def open_cnf_buffer(file_path, use_cache=True):
+    # Flat view of the formula, memory mapped from the cache when it is up to date
+    if use_cache:
+        buffer = _map_cache(file_path)
+        if buffer is not None:
+            return buffer
+    num_vars, num_clauses, clauses = load_dimacs(file_path)
+    if not use_cache:
+        offsets = array('q', accumulate(chain((0,), map(len, clauses))))
+        return CNFBuffer(num_vars, num_clauses, offsets, array('i', chain.from_iterable(clauses)))
+    return write_cache(file_path, num_vars, num_clauses, clauses)
+
+
+def load_cached(file_path, use_cache=True):
+    # Drop-in replacement for load_dimacs: (num_vars, num_clauses, clauses)
+    if use_cache:
+        buffer = _map_cache(file_path)
+        if buffer is not None:
+            clauses = buffer.clauses()
+            buffer.close()
+            return buffer.num_vars, buffer.num_clauses, clauses
+    num_vars, num_clauses, clauses = load_dimacs(file_path)
+    if use_cache:
+        write_cache(file_path, num_vars, num_clauses, clauses)
+    return num_vars, num_clauses, clauses
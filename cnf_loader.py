@@ -0,0 +1,189 @@
+import bz2
+import gc
+import gzip
+import json
+import lzma
+import re
+from contextlib import contextmanager
+from itertools import repeat
+
+# Size of the blocks read from the input file. Each block is tokenized as a whole,
+# so there is no per-line Python work like in the old startswith() parsers.
+CHUNK_SIZE = 1 << 24
+
+_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+}
+
+_COMMENT = re.compile(rb'^[ \t]*c.*$', re.MULTILINE)
+_HEADER = re.compile(rb'^[ \t]*p[ \t]+cnf[ \t]+(\d+)[ \t]+(\d+).*$', re.MULTILINE)
+_END = re.compile(rb'^[ \t]*%', re.MULTILINE)
+_WHITESPACE = bytes.maketrans(b'\t\n\r\v\f', b'     ')
+
+
+def open_cnf(file_path):
+    # Open plain or compressed (.gz/.bz2/.xz) files as a binary stream
+    for extension, opener in _OPENERS.items():
+        if file_path.endswith(extension):
+            return opener(file_path, 'rb')
+    return open(file_path, 'rb')
+
+
+def normalize_clause(clause):
+    # Drop duplicate literals and return None for tautologies.
+    # One set of variables detects both cases, so clean clauses only pay for that.
+    if len(set(map(abs, clause))) == len(clause):
+        return clause
+    clause = list(dict.fromkeys(clause))
+    if len(set(map(abs, clause))) != len(clause):
+        return None
+    return clause
+
+
+def normalize_clauses(clauses):
+    # Counting distinct variables per clause runs entirely inside C iterators; only the
+    # clauses whose count differs from their length go through normalize_clause
+    sizes = list(map(len, clauses))
+    variables = list(map(len, map(set, map(map, repeat(abs), clauses))))
+    if sizes == variables:
+        return clauses
+    result = []
+    for clause, size, count in zip(clauses, sizes, variables):
+        if size != count:
+            clause = normalize_clause(clause)
+            if not clause:
+                continue
+        result.append(clause)
+    return result
+
+
+def parse_clauses(text):
+    # Converts a space separated run of literals ending with a 0 terminator into clauses.
+    # Rewriting the run as a nested JSON array lets the C decoder build every clause at
+    # once; runs with empty clauses or tokens JSON rejects take the index() path instead.
+    text = text.strip()
+    if b'  ' in text:
+        text = b' '.join(text.split())
+    text = text.replace(b' ', b',')
+    if not (text == b'0' or text.startswith(b'0,') or b',0,0,' in text or text.endswith(b',0,0')):
+        try:
+            return json.loads(b'[[' + text[:-2].replace(b',0,', b'],[') + b']]')
+        except ValueError:
+            pass
+    literals = list(map(int, text.split(b',')))
+    clauses = []
+    start = 0
+    while start < len(literals):
+        end = literals.index(0, start)
+        if end > start:
+            clauses.append(literals[start:end])
+        start = end + 1
+    return clauses
+
+
+def _read_lines(file_path):
+    # Lenient fallback for files that never terminate clauses with 0:
+    # every non-comment line is one clause, as the old per-line parsers did
+    header = None
+    clauses = []
+    with open_cnf(file_path) as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith((b'c', b'0')):
+                continue
+            if line.startswith(b'%'):
+                break
+            if line.startswith(b'p'):
+                _, _, num_vars, num_clauses = line.split()[:4]
+                header = int(num_vars), int(num_clauses)
+                continue
+            clause = normalize_clause([int(x) for x in line.split() if x != b'0'])
+            if clause:
+                clauses.append(clause)
+    return header, clauses
+
+
+@contextmanager
+def paused_gc():
+    # The cyclic collector would rescan every clause list created so far on each
+    # collection, which makes building millions of clauses quadratic
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_dimacs(file_path, chunk_size=CHUNK_SIZE):
+    # Returns (num_vars, num_clauses, clauses). Clauses may span lines and a line may
+    # hold several clauses. Duplicate literals and tautologies are removed while loading.
+    with paused_gc():
+        return _load_dimacs(file_path, chunk_size)
+
+
+def _load_dimacs(file_path, chunk_size):
+    header = None
+    clauses = []
+    pending = b''       # literals of a clause that is not terminated yet
+    terminated = False
+    tail = b''
+    with open_cnf(file_path) as file:
+        while True:
+            chunk = file.read(chunk_size)
+            buffer = tail + chunk
+            if chunk:
+                # Only process complete lines so comments are never split between blocks
+                cut = buffer.rfind(b'\n') + 1
+                buffer, tail = buffer[:cut], buffer[cut:]
+                if not buffer:
+                    continue
+            finished = not chunk
+
+            # 'c' only occurs in comments and the "p cnf" header, which normally sit at the
+            # top of the file, so the comment regex only runs up to the last line holding one
+            last_c = buffer.rfind(b'c')
+            if last_c >= 0:
+                end = buffer.find(b'\n', last_c) + 1 or len(buffer)
+                buffer = _COMMENT.sub(b'', buffer[:end]) + buffer[end:]
+            if header is None and b'p' in buffer:
+                match = _HEADER.search(buffer)
+                if match:
+                    header = int(match.group(1)), int(match.group(2))
+                    buffer = buffer[:match.start()] + buffer[match.end():]
+            if b'%' in buffer:
+                # SATLIB end marker, everything after it is padding
+                match = _END.search(buffer)
+                if match:
+                    buffer = buffer[:match.start()]
+                    finished = True
+
+            # Everything up to the last 0 token is a run of complete clauses
+            text = b' ' + pending + b' ' + buffer.translate(_WHITESPACE) + b' '
+            cut = text.rfind(b' 0 ')
+            if cut >= 0:
+                terminated = True
+                clauses.extend(normalize_clauses(parse_clauses(text[:cut + 2])))
+                pending = text[cut + 2:].strip()
+            else:
+                pending = text.strip()
+
+            if finished:
+                break
+
+    if not terminated and pending:
+        header, clauses = _read_lines(file_path)
+    elif pending:
+        # Last clause of the file without its terminating 0
+        clause = normalize_clause(list(map(int, pending.split())))
+        if clause:
+            clauses.append(clause)
+
+    if header is None:
+        num_vars = max((abs(literal) for clause in clauses for literal in clause), default=0)
+        return num_vars, len(clauses), clauses
+    return header[0], header[1], clauses
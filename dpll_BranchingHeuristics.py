@@ -2,6 +2,7 @@ import random
 import sys
 import cProfile
 import pstats
+from cnf_cache import load_cached
 
 class DPLLSolver:
     def __init__(self, file_path, method="first"):
@@ -18,17 +19,7 @@ class DPLLSolver:
         self.frequency_stack = [self.frequency]
 
     def read_dimacs_cnf(self):
-        with open(self.file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(self.file_path)
 
     def intialize_literal_frequency(self):
         for clause in self.clauses:
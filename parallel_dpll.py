@@ -1,35 +1,61 @@
 # from multiprocessing import Process, Pool, cpu_count, Manager, Value, Lock
-from multiprocessing import cpu_count
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import Event, Pool, cpu_count
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import math
 import threading
 from queue import PriorityQueue, Queue
 import sys
 import time
 from collections  import defaultdict
+from cnf_cache import load_cached
+
+# dpll_1 splits the formula into about this many cubes per worker
+CUBES_PER_WORKER = 4
+
+
+def split_depth(workers):
+    # dpll_1 makes 2 ** (depth + 1) cubes when it stops splitting at depth
+    return max(0, math.ceil(math.log2(CUBES_PER_WORKER * workers)) - 1)
+
+
+# Process mode: every pool process gets its own solver, the cubes are sent to it one by one.
+# Once the stop flag is set the solvers give up their cube, so the pool can be closed and
+# joined instead of terminated: a worker killed while it writes a result holds the lock of
+# the result queue and hangs the pool.
+_solver = None
+
+
+def _init_worker(stop):
+    global _solver
+    _solver = DPLLSolver()
+    _solver.stop = stop
+
+
+def _solve_cube(cube):
+    return _solver.dpll(cube[0], cube[1])
+
 
 class DPLLSolver:
-    def __init__(self, file_path):
+    # mode 'process' solves the cubes in a process pool, 'thread' in a thread pool (which the
+    # GIL serializes, kept for comparison). workers defaults to the number of cores.
+    def __init__(self, file_path=None, mode='process', workers=None):
+        if mode not in ('process', 'thread'):
+            raise ValueError(f"Unknown mode: {mode}")
         self.file_path = file_path
         self.clauses = []
         self.num_vars = 0
         self.num_clauses = 0
         self.cubes = []
+        self.mode = mode
+        self.workers = workers or cpu_count()
+        self.split_depth = split_depth(self.workers)
         self.formula_queue = Queue()
-        self.executor = ThreadPoolExecutor(max_workers=cpu_count())
-        self.read_dimacs_cnf()
+        self.stop = None        # dpll() gives up (unsatisfiable) once this event is set
+        if file_path is not None:
+            self.read_dimacs_cnf()
 
     def read_dimacs_cnf(self):
-        with open(self.file_path, 'r') as file:
-            for line in file:
-                if line.startswith('c') or line.startswith('0') or line.startswith('%'):
-                    continue
-                elif line.startswith('p'):
-                    _, _, self.num_vars, self.num_clauses = line.split()
-                    self.num_vars, self.num_clauses = int(self.num_vars), int(self.num_clauses)
-                else:
-                    clause = [int(x) for x in line.split() if x != '0']
-                    if clause:
-                        self.clauses.append(clause)
+        self.num_vars, self.num_clauses, self.clauses = load_cached(self.file_path)
 
     def find_unit_clause(self, formula):
         for clause in formula:
@@ -94,7 +120,7 @@ class DPLLSolver:
         pos_model = model[:]
         neg_model = model[:]
 
-        if depth == 3:
+        if depth == self.split_depth:
             self.cubes.append([pos_formula, model])
             self.cubes.append([neg_formula, model])
             return False, []
@@ -112,6 +138,8 @@ class DPLLSolver:
             return False, []
 
     def dpll(self, formula, model = []):
+        if self.stop is not None and self.stop.is_set():
+            return False, []
         formula, model = self.unit_propagate(formula, model)
         if formula == []:
             return True, model
@@ -134,12 +162,31 @@ class DPLLSolver:
         return False, []
 
     def dpll_parallel(self):
-        cubes = self.cubes
-        with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
-            futures = [executor.submit(self.dpll, cube[0], cube[1]) for cube in cubes]
-            for future in futures:
+        # Results are taken in completion order; the first SAT cube stops the pool workers,
+        # running cubes included
+        if self.mode == 'thread':
+            return self.dpll_threads()
+        stop = Event()
+        with Pool(self.workers, _init_worker, (stop,)) as pool:
+            try:
+                for sat, model in pool.imap_unordered(_solve_cube, self.cubes):
+                    if sat:
+                        return True, model
+            finally:
+                stop.set()
+                pool.close()
+                pool.join()
+        return False, []
+
+    def dpll_threads(self):
+        # Threads cannot be stopped: a SAT cube only cancels the cubes not started yet.
+        # Sibling cubes share their model list, each thread gets a copy.
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.dpll, cube[0], cube[1][:]) for cube in self.cubes]
+            for future in as_completed(futures):
                 sat, model = future.result()
                 if sat:
+                    executor.shutdown(wait=False, cancel_futures=True)
                     return True, model
         return False, []
 
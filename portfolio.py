@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import sys
+import time
+from queue import Empty
+
+from CDCL_Solver import CDCLSolver
+from clause_exchange import ClauseExchange, create_rings
+
+# Portfolio solving: the same formula is raced by CDCLSolver processes with different
+# restart policies, VSIDS decays, initial phases and seeds. The first worker with an answer
+# (SAT or UNSAT) wins and the others are terminated. With share the workers also exchange
+# their short and low LBD learned clauses through shared memory (clause_exchange.py).
+# Usage: python portfolio.py file.cnf [number_of_workers] [share]
+
+# restart_policy goes to solve(), the other keys to the CDCLSolver constructor
+CONFIGURATIONS = [
+    {'restart_policy': 'glucose'},
+    {'restart_policy': 'luby', 'phase': 'negative'},
+    {'restart_policy': 'glucose', 'decay': 0.85, 'seed': 1},
+    {'restart_policy': 'luby', 'decay': 0.99, 'phase': 'positive', 'seed': 2},
+    {'restart_policy': 'glucose', 'phase': 'random', 'seed': 3},
+    {'restart_policy': 'none', 'decay': 0.9, 'seed': 4},
+    {'restart_policy': 'luby', 'decay': 0.9, 'phase': 'random', 'seed': 5},
+    {'restart_policy': 'glucose', 'decay': 0.99, 'phase': 'negative', 'seed': 6},
+]
+
+POLL_INTERVAL = 0.1     # seconds between checks for workers that died without an answer
+
+
+def portfolio_configurations(count):
+    # count configurations; past the end of CONFIGURATIONS the list repeats with new seeds
+    configurations = []
+    for index in range(count):
+        configuration = dict(CONFIGURATIONS[index % len(CONFIGURATIONS)])
+        if index >= len(CONFIGURATIONS):
+            configuration['seed'] = index
+        configurations.append(configuration)
+    return configurations
+
+
+def _worker(index, path, configuration, results, rings):
+    options = dict(configuration)
+    restart_policy = options.pop('restart_policy', 'glucose')
+    exchange = ClauseExchange.attach(rings, index) if rings else None
+    solver = CDCLSolver(exchange=exchange, **options)
+    try:
+        result = solver.solve(path, restart_policy=restart_policy)
+    except Exception as error:
+        results.put((index, 'ERROR', repr(error), None))
+        return
+    finally:
+        if exchange is not None:
+            exchange.close()
+    stats = {
+        'restarts': solver.restart_count,
+        'decisions': solver.decide_count,
+        'implications': solver.imp_count,
+        'learned': solver.learned_count,
+        'propagations': solver.propagations,
+    }
+    if exchange is not None:
+        stats.update(exchange.stats)
+    if result[0] == -1:
+        results.put((index, 'UNSAT', None, stats))
+    elif not result[5]:
+        results.put((index, 'ERROR', 'model failed verification', stats))
+    else:
+        results.put((index, 'SAT', result[0], stats))
+
+
+def solve_portfolio(path, workers=None, configurations=None, time_limit=None, share=False):
+    # Race one process per configuration (default: workers of CONFIGURATIONS, one per core).
+    # Returns a dict with status 'SAT', 'UNSAT' or 'UNKNOWN' (time limit reached or every
+    # worker failed), the model, the index and configuration of the winner, its statistics,
+    # the wall time and the errors of failed workers by index.
+    if configurations is None:
+        configurations = portfolio_configurations(workers or os.cpu_count() or 1)
+    results = multiprocessing.Queue()
+    rings = create_rings(len(configurations)) if share else []
+    names = [ring.name for ring in rings]
+    processes = [multiprocessing.Process(target=_worker, args=(index, path, configuration, results, names), daemon=True)
+                 for index, configuration in enumerate(configurations)]
+    answer = {'status': 'UNKNOWN', 'model': None, 'winner': None, 'configuration': None, 'stats': None}
+    errors = {}
+    start = time.time()
+    for process in processes:
+        process.start()
+    try:
+        pending = len(processes)
+        while pending:
+            if time_limit is not None and time.time() - start > time_limit:
+                break
+            try:
+                index, status, model, stats = results.get(timeout=POLL_INTERVAL)
+            except Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break       # the remaining workers died without reporting
+                continue
+            pending -= 1
+            if status == 'ERROR':
+                errors[index] = model
+                continue
+            answer.update(status=status, model=model, winner=index, configuration=configurations[index], stats=stats)
+            break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        for ring in rings:
+            ring.close()
+            ring.unlink()
+    answer['time'] = time.time() - start
+    answer['errors'] = errors
+    return answer
+
+
+def main():
+    path = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    answer = solve_portfolio(path, workers, share=sys.argv[3:] == ['share'])
+    print(f"Status: {answer['status']}")
+    if answer['status'] == 'SAT':
+        print(f"Model: {answer['model']}")
+    if answer['winner'] is not None:
+        print(f"Winner: worker {answer['winner']} {answer['configuration']}")
+        print(f"Statistics: {answer['stats']}")
+    for index, error in answer['errors'].items():
+        print(f"Worker {index} failed: {error}")
+    print(f"Time: {answer['time']:.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
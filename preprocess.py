@@ -0,0 +1,368 @@
+import time
+from array import array
+from itertools import chain
+
+
+def signature(clause):
+    # 64 bit set of (variable mod 64), a cheap filter for the subset checks
+    bits = 0
+    for literal in clause:
+        bits |= 1 << (abs(literal) & 63)
+    return bits
+
+
+class Preprocessor:
+    # SatELite style simplification ahead of the search, working on occurrence lists
+    # (occurs[lit] is the set of indices of the clauses containing lit, negative literals
+    # wrap around like the solver's value array): unit propagation, backward subsumption
+    # and self-subsuming resolution, failed literal probing, bounded variable elimination
+    # and blocked clause elimination.
+    # Removed clauses the final model still has to satisfy are pushed on a reconstruction
+    # stack as (pivot literal, clause); reconstruct() walks it backwards and makes the pivot
+    # true in every clause the model leaves unsatisfied.
+    # Variables in frozen are never eliminated or used as a blocking literal.
+    # The input clause lists are taken over and modified in place.
+    def __init__(self, num_vars, clauses, frozen=(), time_limit=5.0, occurrence_limit=16,
+                 resolvent_limit=20, probe_limit=1000):
+        self.num_vars = max(num_vars, max(map(abs, chain.from_iterable(clauses)), default=0))
+        self.time_limit = time_limit
+        self.occurrence_limit = occurrence_limit      # max clauses of a variable to eliminate or block on it
+        self.resolvent_limit = resolvent_limit        # max resolvent size during elimination
+        self.probe_limit = probe_limit                # max literals tried by failed literal probing
+        self.deadline = None
+        self.clauses = []           # clause lists, None once removed
+        self.signatures = []
+        self.occurs = [set() for _ in range(2 * self.num_vars + 1)]
+        self.value = array('b', bytes(2 * self.num_vars + 1))
+        self.frozen = bytearray(self.num_vars + 1)
+        for literal in frozen:
+            if abs(literal) <= self.num_vars:     # others do not occur in the formula
+                self.frozen[abs(literal)] = 1
+        self.eliminated = bytearray(self.num_vars + 1)
+        self.units = []             # literals fixed on level 0
+        self.stack = []             # reconstruction stack of (pivot, clause)
+        self.first_pivot = {}       # variable -> first stack position pivoting on it
+        self.pending = []           # units not propagated yet
+        self.touched = []           # clauses to use for backward subsumption
+        self.unsat = False
+        self.stats = {
+            'clauses_before': len(clauses), 'clauses_after': 0,
+            'variables_before': len(set(map(abs, chain.from_iterable(clauses)))), 'variables_after': 0,
+            'units': 0, 'subsumed': 0, 'strengthened': 0, 'failed_literals': 0,
+            'eliminated': 0, 'resolvents': 0, 'blocked': 0, 'time': 0.0,
+        }
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def out_of_time(self):
+        return self.deadline is not None and time.time() > self.deadline
+
+    def add_clause(self, clause):
+        if self.unsat:
+            return
+        value = self.value
+        if any(map(value.__getitem__, clause)):
+            if any(value[literal] == 1 for literal in clause):
+                return
+            clause = [literal for literal in clause if value[literal] == 0]
+        if not clause:
+            self.unsat = True
+            return
+        if len(clause) == 1:
+            self.assign(clause[0])
+            return
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.signatures.append(signature(clause))
+        for literal in clause:
+            self.occurs[literal].add(index)
+        self.touched.append(index)
+
+    def push(self, pivot, clause):
+        self.first_pivot.setdefault(abs(pivot), len(self.stack))
+        self.stack.append((pivot, clause))
+
+    def remove_clause(self, index):
+        for literal in self.clauses[index]:
+            self.occurs[literal].discard(index)
+        self.clauses[index] = None
+
+    def strengthen(self, index, literal):
+        # Remove literal from the clause
+        clause = self.clauses[index]
+        clause.remove(literal)
+        self.occurs[literal].discard(index)
+        if len(clause) == 1:
+            self.remove_clause(index)
+            self.assign(clause[0])
+            return
+        self.signatures[index] = signature(clause)
+        self.touched.append(index)
+
+    def assign(self, literal):
+        value = self.value
+        if value[literal] == 1:
+            return
+        if value[literal] == -1:
+            self.unsat = True
+            return
+        value[literal] = 1
+        value[-literal] = -1
+        self.units.append(literal)
+        self.pending.append(literal)
+
+    def propagate(self):
+        # Top level unit propagation: drop satisfied clauses, strengthen the others
+        while self.pending and not self.unsat:
+            literal = self.pending.pop()
+            for index in list(self.occurs[literal]):
+                self.remove_clause(index)
+            for index in list(self.occurs[-literal]):
+                self.strengthen(index, -literal)
+        return not self.unsat
+
+    def subsume(self):
+        # Backward subsumption and self-subsuming resolution with every touched clause. The
+        # units found are propagated before each round and once the touched clauses run out.
+        while self.propagate() and self.touched and not self.out_of_time():
+            touched = self.touched
+            self.touched = []
+            for index in dict.fromkeys(touched):
+                if self.clauses[index] is not None:
+                    self.backward_subsume(index)
+
+    def backward_subsume(self, index):
+        # Every clause D that contains the clause C is removed; if C matches D except for one
+        # literal that occurs negated in D, that literal is removed from D instead
+        clause = self.clauses[index]
+        occurs = self.occurs
+        clauses = self.clauses
+        signatures = self.signatures
+        bits = signatures[index]
+        size = len(clause)
+        best = min(clause, key=lambda literal: len(occurs[literal]) + len(occurs[-literal]))
+        for other_index in list(occurs[best]) + list(occurs[-best]):
+            other = clauses[other_index]
+            if other_index == index or other is None or len(other) < size or bits & ~signatures[other_index]:
+                continue
+            other_set = set(other)
+            flip = 0
+            for literal in clause:
+                if literal in other_set:
+                    continue
+                if not flip and -literal in other_set:
+                    flip = literal
+                    continue
+                break
+            else:
+                if flip:
+                    self.stats['strengthened'] += 1
+                    self.strengthen(other_index, -flip)
+                else:
+                    self.stats['subsumed'] += 1
+                    self.remove_clause(other_index)
+            if clauses[index] is None:
+                return
+
+    def probe(self):
+        # Failed literal probing on the literals with the most binary clauses: if assigning a
+        # literal propagates into a conflict, its negation holds on level 0
+        clauses = self.clauses
+        binary = [0] * (2 * self.num_vars + 1)
+        for clause in clauses:
+            if clause is not None and len(clause) == 2:
+                binary[-clause[0]] += 1
+                binary[-clause[1]] += 1
+        literals = [literal for literal in chain(range(1, self.num_vars + 1), range(-self.num_vars, 0))
+                    if binary[literal]]
+        literals.sort(key=binary.__getitem__, reverse=True)
+        for literal in literals[:self.probe_limit]:
+            if not self.propagate() or self.out_of_time():
+                return
+            if self.value[literal] == 0 and self.probe_literal(literal):
+                self.stats['failed_literals'] += 1
+                self.assign(-literal)
+        self.propagate()
+
+    def probe_literal(self, literal):
+        # Tentatively assign literal, propagate over the occurrence lists, undo. True on conflict.
+        # Literals assigned on level 0 count as false or satisfy their clause.
+        value = self.value
+        occurs = self.occurs
+        clauses = self.clauses
+        trail = [literal]
+        value[literal] = 1
+        value[-literal] = -1
+        head = 0
+        conflict = False
+        while head < len(trail) and not conflict:
+            false_literal = -trail[head]
+            head += 1
+            for index in occurs[false_literal]:
+                free = 0
+                implied = 0
+                for other in clauses[index]:
+                    other_value = value[other]
+                    if other_value == 1:
+                        break
+                    if other_value == 0:
+                        free += 1
+                        implied = other
+                        if free > 1:
+                            break
+                else:
+                    if not free:
+                        conflict = True
+                        break
+                    value[implied] = 1
+                    value[-implied] = -1
+                    trail.append(implied)
+        for assigned in trail:
+            value[assigned] = 0
+            value[-assigned] = 0
+        return conflict
+
+    def resolve(self, positive, negative, variable):
+        # Resolvent of two clauses on variable, None if it is a tautology
+        resolvent = [literal for literal in positive if literal != variable]
+        present = set(resolvent)
+        for literal in negative:
+            if literal == -variable or literal in present:
+                continue
+            if -literal in present:
+                return None
+            resolvent.append(literal)
+        return resolvent
+
+    def eliminate(self):
+        # Bounded variable elimination, cheapest variables first: replace the clauses of a
+        # variable by their resolvents when that does not increase the number of clauses
+        occurs = self.occurs
+        candidates = [variable for variable in range(1, self.num_vars + 1)
+                      if not self.frozen[variable] and (occurs[variable] or occurs[-variable])
+                      and len(occurs[variable]) + len(occurs[-variable]) <= self.occurrence_limit]
+        candidates.sort(key=lambda variable: len(occurs[variable]) * len(occurs[-variable]))
+        for variable in candidates:
+            if not self.propagate() or self.out_of_time():
+                return
+            count = len(occurs[variable]) + len(occurs[-variable])
+            if self.value[variable] or not count or count > self.occurrence_limit:
+                continue
+            if self.eliminate_variable(variable):
+                self.subsume()
+
+    def eliminate_variable(self, variable):
+        # Needs the level 0 units propagated: the clauses must not contain assigned literals
+        clauses = self.clauses
+        positive = [clauses[index] for index in self.occurs[variable]]
+        negative = [clauses[index] for index in self.occurs[-variable]]
+        limit = len(positive) + len(negative)
+        resolvents = []
+        for first in positive:
+            for second in negative:
+                resolvent = self.resolve(first, second, variable)
+                if resolvent is None:
+                    continue
+                if len(resolvent) > self.resolvent_limit or len(resolvents) == limit:
+                    return False
+                resolvents.append(resolvent)
+        for literal in (variable, -variable):
+            for index in list(self.occurs[literal]):
+                self.push(literal, clauses[index])
+                self.remove_clause(index)
+        self.eliminated[variable] = 1
+        self.stats['eliminated'] += 1
+        self.stats['resolvents'] += len(resolvents)
+        for resolvent in resolvents:
+            self.add_clause(resolvent)
+        return True
+
+    def block(self):
+        # Blocked clause elimination: a clause is blocked on one of its literals when every
+        # resolvent on that literal is a tautology
+        # Units are propagated first, so no clause left contains an assigned literal
+        if not self.propagate():
+            return
+        occurs = self.occurs
+        clauses = self.clauses
+        value = self.value
+        for index in range(len(clauses)):
+            clause = clauses[index]
+            if clause is None:
+                continue
+            if self.out_of_time():
+                return
+            present = set(clause)
+            for literal in clause:
+                if value[literal] or self.frozen[abs(literal)] or len(occurs[-literal]) > self.occurrence_limit:
+                    continue
+                if all(any(-other in present for other in clauses[other_index] if other != -literal)
+                       for other_index in occurs[-literal]):
+                    self.push(literal, clause)
+                    self.remove_clause(index)
+                    self.stats['blocked'] += 1
+                    break
+
+    def occurring_variables(self):
+        occurs = self.occurs
+        return sum(1 for variable in range(1, self.num_vars + 1) if occurs[variable] or occurs[-variable])
+
+    def run(self, simplify=True):
+        # Returns False when the formula was found unsatisfiable. Without simplify only the
+        # unit clauses are propagated.
+        start = time.time()
+        self.deadline = start + self.time_limit
+        self.propagate()
+        if simplify:
+            self.subsume()
+            if not self.unsat:
+                self.probe()
+            if not self.unsat:
+                self.eliminate()
+            if not self.unsat:
+                self.block()
+        self.propagate()
+        self.touched = []
+        self.stats['units'] = len(self.units)
+        self.stats['clauses_after'] = sum(1 for clause in self.clauses if clause is not None)
+        self.stats['variables_after'] = self.occurring_variables()
+        self.stats['time'] = time.time() - start
+        return not self.unsat
+
+    def simplified_clauses(self):
+        return [clause for clause in self.clauses if clause is not None]
+
+    def restore(self, variables):
+        # Incremental use: before clauses or assumptions mention one of variables again, the
+        # clauses removed because of it have to be part of the formula again. Entries pushed
+        # later may depend on their absence, so everything from the first such entry on is
+        # taken off the stack and returned for the caller to add back.
+        positions = [self.first_pivot[variable] for variable in variables if variable in self.first_pivot]
+        if not positions:
+            return []
+        start = min(positions)
+        restored = self.stack[start:]
+        del self.stack[start:]
+        self.first_pivot = {variable: position for variable, position in self.first_pivot.items() if position < start}
+        for pivot, _ in restored:
+            self.eliminated[abs(pivot)] = 0
+        return [clause[:] for _, clause in restored]
+
+    def reconstruct(self, model):
+        # Extend a model of the simplified formula (list of literals) to the original one.
+        # Flipping a pivot only keeps the other clauses satisfied under a total assignment,
+        # so the variables the model leaves open start out false.
+        num_vars = max(self.num_vars, max(map(abs, model), default=0))
+        value = array('b', bytes(2 * num_vars + 1))
+        for literal in chain(self.units, model):
+            value[literal] = 1
+            value[-literal] = -1
+        for variable in range(1, num_vars + 1):
+            if not value[variable]:
+                value[variable] = -1
+                value[-variable] = 1
+        for pivot, clause in reversed(self.stack):
+            if not any(value[literal] == 1 for literal in clause):
+                value[pivot] = 1
+                value[-pivot] = -1
+        return [variable if value[variable] == 1 else -variable for variable in range(1, num_vars + 1)]
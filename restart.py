@@ -0,0 +1,99 @@
+# Restart policies for CDCLSolver. The solver reports every conflict with the LBD of the
+# clause it learned and asks should_restart() before each decision; on_restart() is
+# called after it backtracked to level 0.
+
+
+class NoRestart:
+    def on_conflict(self, lbd):
+        pass
+
+    def should_restart(self):
+        return False
+
+    def on_restart(self):
+        pass
+
+
+def luby(index):
+    # index-th element (from 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ...
+    size, power = 1, 0
+    while size < index + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power -= 1
+        index %= size
+    return 1 << power
+
+
+class LubyRestart:
+    # Restart after unit * luby(i) conflicts for the i-th restart
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+        self.limit = unit * luby(0)
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+
+    def should_restart(self):
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.restarts += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.restarts)
+
+
+class EMA:
+    # Exponential moving average; the smoothing starts at 1 and halves down to alpha,
+    # so the first values are not biased towards the initial 0
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.beta = 1.0
+        self.value = 0.0
+
+    def update(self, sample):
+        self.value += self.beta * (sample - self.value)
+        if self.beta > self.alpha:
+            self.beta = max(self.beta / 2, self.alpha)
+
+
+class GlucoseRestart:
+    # Restart when the recent learned clauses are clearly worse (higher LBD) than the
+    # long term average: fast EMA > margin * slow EMA, at least min_conflicts apart
+    def __init__(self, fast=1 / 32, slow=1 / 4096, margin=1.25, min_conflicts=50):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.margin = margin
+        self.min_conflicts = min_conflicts
+        self.conflicts = 0
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+        self.fast.update(lbd)
+        self.slow.update(lbd)
+
+    def should_restart(self):
+        return self.conflicts >= self.min_conflicts and self.fast.value > self.margin * self.slow.value
+
+    def on_restart(self):
+        self.conflicts = 0
+
+
+RESTART_POLICIES = {
+    'none': NoRestart,
+    'luby': LubyRestart,
+    'glucose': GlucoseRestart,
+}
+
+
+def make_restart_policy(policy):
+    # Accepts a policy name from RESTART_POLICIES or a ready policy object
+    if isinstance(policy, str):
+        if policy not in RESTART_POLICIES:
+            raise ValueError(f"Unknown restart policy: {policy}")
+        return RESTART_POLICIES[policy]()
+    return policy
@@ -0,0 +1,31 @@
+from clause_exchange import ClauseRing
+
+
+def test_lapped_reader_skips_the_slot_being_overwritten():
+    # Fill the ring, then half rewrite slot 0 as the writer of clause 5 would before it
+    # publishes it: the clause that was in slot 0 is lost, the garbage is not read
+    ring = ClauseRing.create(capacity=4, max_size=3)
+    try:
+        for number in range(1, 5):
+            ring.write([number, -number], number)
+        ring.slots[0] = 99
+        ring.slots[1] = 3
+        clauses, position, lost = ring.read(0)
+        assert clauses == [([2, -2], 2), ([3, -3], 3), ([4, -4], 4)]
+        assert position == 4
+        assert lost == 1
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_reader_gets_every_published_clause():
+    ring = ClauseRing.create(capacity=4, max_size=3)
+    try:
+        ring.write([1, 2, 3], 2)
+        ring.write([-4], 1)
+        assert ring.read(0) == ([([1, 2, 3], 2), ([-4], 1)], 2, 0)
+        assert ring.read(2) == ([], 2, 0)
+    finally:
+        ring.close()
+        ring.unlink()
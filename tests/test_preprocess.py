@@ -0,0 +1,28 @@
+from CDCL_Solver import CDCLSolver
+from preprocess import Preprocessor
+
+# Unsatisfiable, but only after the units the subsumption rounds find are propagated
+FORMULA = [[-1, -2], [2, 1], [2, -1], [-2, 1]]
+
+
+def test_units_found_by_strengthening_are_propagated():
+    assert not Preprocessor(2, [clause[:] for clause in FORMULA]).run()
+
+
+def test_incremental_formula_is_unsatisfiable():
+    for preprocess in (True, False):
+        solver = CDCLSolver(preprocess=preprocess)
+        for clause in FORMULA:
+            solver.add_clause(clause)
+        assert solver.solve()[0] == -1
+
+
+def test_model_is_verified_against_the_input_formula():
+    # Level 0 propagation leaves no clause in the simplified formula
+    solver = CDCLSolver()
+    for clause in [[1], [1, 2], [-1, 2]]:
+        solver.add_clause(clause)
+    result = solver.solve()
+    assert result[0] == [1, 2] and result[5]
+    solver.model = [1, -2]
+    assert not solver.verify_solution()
@@ -0,0 +1,118 @@
+from array import array
+
+# Activities above this are scaled down together with the increment; the order of the
+# variables, and so the heap, stays the same
+RESCALE_LIMIT = 1e100
+
+
+class VSIDS:
+    # Variable activities plus a binary max-heap of the decision candidates.
+    # Decay is done by growing the bump increment instead of multiplying every activity,
+    # so a conflict only touches the variables it bumps. Assigned variables are left in
+    # the heap and skipped when popped; backtracking puts the unassigned ones back.
+    def __init__(self, num_vars, decay=0.95):
+        self.activity = array('d', bytes(8 * (num_vars + 1)))
+        self.increment = 1.0
+        self.decay = decay
+        self.heap = []
+        self.indices = array('i', [-1]) * (num_vars + 1)   # heap position, -1 if not in the heap
+
+    def build(self, variables):
+        # Heap over the given variables; sorted by activity it already has the heap property
+        self.heap = sorted(variables, key=self.activity.__getitem__, reverse=True)
+        for position, variable in enumerate(self.heap):
+            self.indices[variable] = position
+
+    def grow(self, num_vars):
+        # Room for variables added after construction, they start with activity 0
+        extra = num_vars + 1 - len(self.activity)
+        if extra > 0:
+            self.activity.extend(array('d', bytes(8 * extra)))
+            self.indices.extend(array('i', [-1]) * extra)
+
+    def __contains__(self, variable):
+        return self.indices[variable] >= 0
+
+    def bump(self, variable):
+        activity = self.activity
+        activity[variable] += self.increment
+        if activity[variable] > RESCALE_LIMIT:
+            self.rescale()
+        position = self.indices[variable]
+        if position >= 0:
+            self._sift_up(position)
+
+    def decay_increment(self):
+        self.increment /= self.decay
+        if self.increment > RESCALE_LIMIT:
+            self.rescale()
+
+    def rescale(self):
+        activity = self.activity
+        for variable in range(len(activity)):
+            activity[variable] *= 1 / RESCALE_LIMIT
+        self.increment *= 1 / RESCALE_LIMIT
+
+    def insert(self, variable):
+        if self.indices[variable] < 0:
+            self.indices[variable] = len(self.heap)
+            self.heap.append(variable)
+            self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        # Remove and return the variable with the highest activity, 0 if the heap is empty
+        heap = self.heap
+        if not heap:
+            return 0
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self._sift_down(0)
+        return top
+
+    def next_unassigned(self, value):
+        # Pop until an unassigned variable comes up; value is the solver's literal-indexed array
+        variable = self.pop()
+        while variable and value[variable] != 0:
+            variable = self.pop()
+        return variable
+
+    def _sift_up(self, position):
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        variable = heap[position]
+        score = activity[variable]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if activity[heap[parent]] >= score:
+                break
+            heap[position] = heap[parent]
+            indices[heap[position]] = position
+            position = parent
+        heap[position] = variable
+        indices[variable] = position
+
+    def _sift_down(self, position):
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        size = len(heap)
+        variable = heap[position]
+        score = activity[variable]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= score:
+                break
+            heap[position] = heap[child]
+            indices[heap[position]] = position
+            position = child
+        heap[position] = variable
+        indices[variable] = position